@@ -0,0 +1,169 @@
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage, Page
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from api.caching import render_json
+from api.exports import EXPORT_FORMATS
+from api.paginations import PageLimitNumberPagination
+from api.serializers import RecipeImageSerializer, SubscribeSerializer
+from api.views import (CustomUserViewSet, RecipeViewSet, recipes_by_author,
+                       shopping_list_rows)
+from recipes.models import Recipe
+from users.models import Follow
+
+subscriptions_view = CustomUserViewSet.as_view(
+    {'get': 'get_subscriptions'},
+    **CustomUserViewSet.get_subscriptions.kwargs
+)
+
+
+async def database(func, *args):
+    return await sync_to_async(func, thread_sensitive=True)(*args)
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        render_json(data), status=status_code,
+        content_type='application/json'
+    )
+
+
+def error_response(exc):
+    response = json_response({'detail': exc.detail}, exc.status_code)
+    if isinstance(exc, (exceptions.AuthenticationFailed,
+                        exceptions.NotAuthenticated)):
+        response['WWW-Authenticate'] = 'Token'
+    return response
+
+
+def rest_request(request):
+    return Request(
+        request,
+        parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES],
+        authenticators=[
+            authenticator()
+            for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ]
+    )
+
+
+async def authenticate(request):
+    user = await database(lambda: request.user)
+    if not user.is_authenticated:
+        raise exceptions.NotAuthenticated
+    return user
+
+
+def allow_methods(*methods):
+    def decorator(view):
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = error_response(
+                    exceptions.MethodNotAllowed(request.method)
+                )
+                response['Allow'] = ', '.join(methods)
+                return response
+            try:
+                return await view(rest_request(request), *args, **kwargs)
+            except exceptions.APIException as exc:
+                return error_response(exc)
+        return wrapper
+    return decorator
+
+
+@allow_methods('GET')
+async def download_shopping_cart(request):
+    user = await authenticate(request)
+    export_format = request.query_params.get('format', 'txt')
+    if export_format not in EXPORT_FORMATS:
+        return json_response({
+            'errors': 'Неподдерживаемый формат списка покупок'
+        }, status.HTTP_400_BAD_REQUEST)
+
+    basket_components = await database(
+        lambda: list(shopping_list_rows(user))
+    )
+    if not basket_components:
+        return json_response({
+            'errors': 'Список покупок пуст'
+        }, status.HTTP_400_BAD_REQUEST)
+
+    content_type, export = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        export(basket_components), content_type=content_type
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="shopping_list.{export_format}"'
+    )
+    return response
+
+
+@allow_methods('GET')
+async def subscriptions(request):
+    user = await authenticate(request)
+    pagination = PageLimitNumberPagination()
+    page_number = request.query_params.get(pagination.page_query_param, '1')
+    if (
+        pagination.cursor_query_param in request.query_params
+        or not page_number.isdigit() or int(page_number) < 1
+    ):
+        return await sync_to_async(
+            lambda: subscriptions_view(request._request).render()
+        )()
+
+    page_size = pagination.get_page_size(request)
+    queryset = Follow.objects.filter(user=user).select_related('author')
+    paginator = pagination.django_paginator_class(queryset, page_size)
+    number = int(page_number)
+    bottom = (number - 1) * page_size
+
+    def page_with_recipes():
+        follows = list(queryset[bottom:bottom + page_size])
+        return queryset.count(), follows, recipes_by_author(
+            follows, request.query_params.get('recipes_limit')
+        )
+
+    paginator.count, follows, recipes = await database(page_with_recipes)
+    try:
+        paginator.validate_number(number)
+    except InvalidPage as exc:
+        raise exceptions.NotFound(pagination.invalid_page_message.format(
+            page_number=page_number, message=str(exc)
+        ))
+    pagination.page = Page(follows, number, paginator)
+    pagination.request = request
+    pagination.cursor_mode = False
+    serializer = SubscribeSerializer(
+        follows, many=True,
+        context={'request': request, 'recipes_by_author': recipes}
+    )
+    data = await database(lambda: serializer.data)
+    return json_response(pagination.get_paginated_response(data).data)
+
+
+@allow_methods('PUT')
+async def recipe_image(request, pk):
+    await authenticate(request)
+    serializer = RecipeImageSerializer(
+        data=request.data,
+        context={'request': request, 'format': None, 'view': None}
+    )
+    recipe = await database(
+        Recipe.objects.select_related('author').filter(pk=pk).first
+    )
+    if recipe is None:
+        raise exceptions.NotFound
+    for permission in RecipeViewSet.permission_classes:
+        if not permission().has_object_permission(request, None, recipe):
+            raise exceptions.PermissionDenied
+    if not await database(serializer.is_valid):
+        return json_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    def save():
+        serializer.instance = recipe
+        serializer.save()
+        return serializer.data
+    return json_response(await database(save))
@@ -0,0 +1,126 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.permissions import SAFE_METHODS
+
+STATS = ('local_hits', 'shared_hits', 'misses')
+
+
+def token_digest(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def shared_key(digest):
+    return f'token_auth:{digest}'
+
+
+def stats_key(name):
+    return f'token_auth_stats:{name}'
+
+
+class TokenCache:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = Counter()
+        self._flushed = time.monotonic()
+
+    def get(self, key):
+        digest = token_digest(key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[1] <= now:
+                del self._entries[digest]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(digest)
+        if entry is not None:
+            self.count('local_hits')
+            return copy.copy(entry[0])
+        if settings.TOKEN_AUTH_SHARED_CACHE:
+            user = cache.get(shared_key(digest))
+            if user is not None:
+                self.remember(digest, user)
+                self.count('shared_hits')
+                return user
+        self.count('misses')
+        return None
+
+    def set(self, key, user):
+        digest = token_digest(key)
+        self.remember(digest, user)
+        if settings.TOKEN_AUTH_SHARED_CACHE:
+            cache.set(
+                shared_key(digest), user, settings.TOKEN_AUTH_SHARED_TTL
+            )
+
+    def remember(self, digest, user):
+        expires = time.monotonic() + settings.TOKEN_AUTH_LOCAL_TTL
+        with self._lock:
+            self._entries[digest] = (copy.copy(user), expires)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > settings.TOKEN_AUTH_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def forget(self, keys):
+        digests = [token_digest(key) for key in keys]
+        with self._lock:
+            for digest in digests:
+                self._entries.pop(digest, None)
+        if digests:
+            cache.delete_many([shared_key(digest) for digest in digests])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+    def count(self, name):
+        now = time.monotonic()
+        with self._lock:
+            self._stats[name] += 1
+            if now - self._flushed < settings.TOKEN_AUTH_STATS_INTERVAL:
+                return
+            stats, self._stats = self._stats, Counter()
+            self._flushed = now
+        self.flush(stats)
+
+    def flush(self, stats):
+        for name, value in stats.items():
+            cache.add(stats_key(name), 0, None)
+            cache.incr(stats_key(name), value)
+
+    def stats(self):
+        with self._lock:
+            local = dict(self._stats)
+        return {
+            name: cache.get(stats_key(name), 0) + local.get(name, 0)
+            for name in STATS
+        }
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    use_cache = False
+
+    def authenticate(self, request):
+        self.use_cache = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        user = token_cache.get(key) if self.use_cache else None
+        if user is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user)
+            return user, token
+        return user, self.get_model()(key=key, user=user)
@@ -0,0 +1,193 @@
+import hashlib
+import time
+from itertools import chain
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import parse_etags, patch_cache_control
+from django.utils.http import urlencode
+from django.utils.module_loading import import_string
+
+from api.routers import primary_reads, replica_staleness
+
+
+def version_key(name):
+    return f'content_version:{name}'
+
+
+def get_version(name):
+    version = cache.get(version_key(name))
+    if version is None:
+        cache.add(version_key(name), uuid4().hex, None)
+        version = cache.get(version_key(name))
+    return version
+
+
+def bump_version(name):
+    cache.set(version_key(name), uuid4().hex, None)
+
+
+def changes_key(name):
+    return f'changes:{name}'
+
+
+def get_sequence(name):
+    return cache.get(changes_key(name), 0)
+
+
+def log_changes(name, ids):
+    key = changes_key(name)
+    cache.add(key, 0, None)
+    sequence = cache.incr(key)
+    cache.set(f'{key}:{sequence}', list(ids), settings.REFERENCE_CACHE_TIMEOUT)
+    return sequence
+
+
+def read_changes(name, since, until):
+    keys = [
+        f'{changes_key(name)}:{sequence}'
+        for sequence in range(since + 1, until + 1)
+    ]
+    entries = cache.get_many(keys)
+    if len(entries) != len(keys):
+        return None
+    return set(chain.from_iterable(entries.values()))
+
+
+def render_json(data):
+    return import_string(settings.JSON_RENDERER)().render(data)
+
+
+def normalized_query(request):
+    return urlencode(sorted(request.query_params.lists()), doseq=True)
+
+
+def invalidation_key(tag):
+    return f'invalidated:{tag}'
+
+
+def invalidate(*tags):
+    def purge():
+        now = time.time()
+        cache.set_many(
+            {invalidation_key(tag): now for tag in tags},
+            settings.ANONYMOUS_CACHE_TIMEOUT * 2
+        )
+    transaction.on_commit(purge)
+
+
+def is_fresh(entry):
+    invalidated = cache.get_many(
+        [invalidation_key(tag) for tag in entry['tags']]
+    )
+    return all(
+        timestamp < entry['created'] for timestamp in invalidated.values()
+    )
+
+
+class VersionedCacheMixin:
+    cache_version = None
+
+    def perform_authentication(self, request):
+        pass
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cache_key(self, request):
+        return (
+            f'reference:{self.cache_version}:'
+            f'{get_version(self.cache_version)}:{request.path}?'
+            f'{normalized_query(request)}'
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            with primary_reads():
+                response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            content = render_json(response.data)
+            entry = (f'"{hashlib.md5(content).hexdigest()}"', content)
+            cache.set(key, entry, settings.REFERENCE_CACHE_TIMEOUT)
+        etag, content = entry
+        if_none_match = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.REFERENCE_CACHE_MAX_AGE
+        )
+        return response
+
+
+class AnonymousCacheMixin:
+
+    def list(self, request, *args, **kwargs):
+        return self.anonymous_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.anonymous_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cache_tags(self, data):
+        raise NotImplementedError
+
+    def wait_for_entry(self, key, lock):
+        deadline = time.monotonic() + settings.ANONYMOUS_CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(settings.ANONYMOUS_CACHE_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None and is_fresh(entry):
+                return entry
+            if cache.get(lock) is None:
+                return None
+        return None
+
+    def anonymous_response(self, handler, request, *args, **kwargs):
+        if request.META.get('HTTP_AUTHORIZATION'):
+            return handler(request, *args, **kwargs)
+        key = (
+            f'anonymous:{request.build_absolute_uri(request.path)}?'
+            f'{normalized_query(request)}'
+        )
+        entry = cache.get(key)
+        if entry is not None and is_fresh(entry):
+            return self.entry_response(entry)
+        lock = f'{key}:lock'
+        locked = cache.add(lock, 1, settings.ANONYMOUS_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            entry = self.wait_for_entry(key, lock)
+            if entry is not None:
+                return self.entry_response(entry)
+        try:
+            created = time.time() - replica_staleness()
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            entry = {
+                'created': created,
+                'tags': sorted(self.get_cache_tags(response.data)),
+                'content': render_json(response.data),
+            }
+            cache.set(key, entry, settings.ANONYMOUS_CACHE_TIMEOUT)
+        finally:
+            if locked:
+                cache.delete(lock)
+        return self.entry_response(entry)
+
+    def entry_response(self, entry):
+        return HttpResponse(entry['content'], content_type='application/json')
@@ -0,0 +1,39 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from recipes.models import Basket, FavourRecipe, Recipe
+from users.models import Follow
+
+USER_COUNTERS = {
+    'recipes_count': (Recipe, 'author'),
+    'followers_count': (Follow, 'author'),
+    'favorites_count': (FavourRecipe, 'user'),
+    'basket_count': (Basket, 'user'),
+}
+RECIPE_COUNTERS = {
+    'favorites_count': (FavourRecipe, 'recipe'),
+}
+
+
+def bump(queryset, **deltas):
+    return queryset.update(**{
+        field: Greatest(F(field) + delta, 0)
+        for field, delta in deltas.items()
+    })
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')}).order_by()
+            .values(field).annotate(total=Count('pk')).values('total')
+        ),
+        0
+    )
+
+
+def recount(queryset, counters):
+    return queryset.update(**{
+        name: count_subquery(model, field)
+        for name, (model, field) in counters.items()
+    })
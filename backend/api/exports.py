@@ -0,0 +1,59 @@
+import csv
+import json
+
+from rest_framework.negotiation import DefaultContentNegotiation
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+class ExportContentNegotiation(DefaultContentNegotiation):
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderer = renderers[0]
+        return renderer, renderer.media_type
+
+
+def export_txt(components):
+    yield 'Список продуктов к покупке\r\n\r\n'
+    for component in components:
+        yield (
+            f'* {component["product__name"]} - '
+            f'{component["quantity"]} '
+            f'{component["product__measurement_unit"]} \r\n'
+        )
+
+
+def export_csv(components):
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for component in components:
+        yield writer.writerow((
+            component['product__name'],
+            component['product__measurement_unit'],
+            component['quantity'],
+        ))
+
+
+def export_json(components):
+    separator = '['
+    for component in components:
+        yield separator + json.dumps({
+            'name': component['product__name'],
+            'measurement_unit': component['product__measurement_unit'],
+            'amount': component['quantity'],
+        }, ensure_ascii=False)
+        separator = ','
+    yield '[]' if separator == '[' else ']'
+
+
+EXPORT_FORMATS = {
+    'txt': ('text/plain; charset=utf-8', export_txt),
+    'csv': ('text/csv; charset=utf-8', export_csv),
+    'json': ('application/json; charset=utf-8', export_json),
+}
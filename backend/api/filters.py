@@ -1,7 +1,12 @@
+from django.conf import settings
+from django.core.cache import cache
 from django_filters.rest_framework import FilterSet, filters
 from rest_framework.filters import SearchFilter
 
-from recipes.models import Recipe
+from api.caching import get_version
+from api.routers import primary_reads
+from recipes.models import Recipe, Tag
+from recipes.search import search_recipes
 from users.models import CustomUser
 
 
@@ -9,28 +14,63 @@ class ProductSearchFilter(SearchFilter):
     search_param = 'name'
 
 
+def get_tag_masks():
+    key = f'tag_masks:{get_version("tags")}'
+    masks = cache.get(key)
+    if masks is None:
+        with primary_reads():
+            masks = dict(
+                Tag.objects.exclude(slug=None).values_list('slug', 'bit_mask')
+            )
+        cache.set(key, masks, settings.REFERENCE_CACHE_TIMEOUT)
+    return masks
+
+
+def tag_choices():
+    return [(slug, slug) for slug in get_tag_masks()]
+
+
 class RecipeQueryParamFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices, method='get_tags'
+    )
+    tags_match = filters.ChoiceFilter(
+        choices=(('any', 'Любой из тегов'), ('all', 'Все теги')),
+        method='skip_filter'
+    )
     author = filters.ModelChoiceFilter(queryset=CustomUser.objects.all())
     is_favorited = filters.BooleanFilter(method='get_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='get_is_in_shopping_cart'
     )
+    search = filters.CharFilter(method='get_search')
 
     class Meta:
         model = Recipe
-        fields = ('tags', 'author', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('tags', 'tags_match', 'author', 'is_favorited',
+                  'is_in_shopping_cart', 'search')
+
+    def get_tags(self, queryset, name, value):
+        masks = get_tag_masks()
+        return queryset.with_tags(
+            (masks[slug] for slug in value),
+            match_all=self.form.cleaned_data.get('tags_match') == 'all'
+        )
+
+    def skip_filter(self, queryset, name, value):
+        return queryset
 
     def get_is_favorited(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(
-                favourite__user=self.request.user
-            ).prefetch_related('ingredients')
+            return queryset.filter(favourite__user=self.request.user)
         return queryset
 
     def get_is_in_shopping_cart(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(
-                basket_recipes__user=self.request.user
-            ).prefetch_related('ingredients')
+            return queryset.filter(basket_recipes__user=self.request.user)
+        return queryset
+
+    def get_search(self, queryset, name, value):
+        if value.strip():
+            return search_recipes(queryset, value)
         return queryset
@@ -0,0 +1,151 @@
+import threading
+from bisect import bisect_left
+
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from api.caching import get_sequence, get_version, log_changes, read_changes
+from api.routers import primary_reads
+from recipes.models import Component, Product
+from recipes.search import normalize
+
+
+class ProductPrefixIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._keys = []
+        self._rows = []
+
+    def _current(self):
+        version = get_version('products')
+        with self._lock, primary_reads():
+            if self._version != version:
+                products = sorted(
+                    (
+                        (normalize(product['name']), product)
+                        for product in Product.objects.values(
+                            'id', 'name', 'measurement_unit'
+                        ).iterator()
+                    ),
+                    key=lambda item: (item[0], item[1]['id'])
+                )
+                self._keys = [key for key, _ in products]
+                self._rows = [product for _, product in products]
+                self._version = version
+            return self._keys, self._rows
+
+    def search(self, query, limit):
+        query = normalize(query)
+        keys, rows = self._current()
+        result = []
+        position = bisect_left(keys, query)
+        while (
+            position < len(keys) and len(result) < limit
+            and keys[position].startswith(query)
+        ):
+            result.append(rows[position])
+            position += 1
+        if len(result) < limit:
+            for key, row in zip(keys, rows):
+                if query in key and not key.startswith(query):
+                    result.append(row)
+                    if len(result) == limit:
+                        break
+        return result
+
+
+product_index = ProductPrefixIndex()
+
+
+class RecipeProductMatrix:
+    changes = 'recipe_components'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sequence = None
+        self._columns = {}
+        self._recipe_ids = np.empty(0, dtype=np.int64)
+        self._matrix = sparse.csr_matrix((0, 0), dtype=np.int32)
+        self._sizes = np.empty(0, dtype=np.int32)
+
+    def mark_changed(self, recipe_ids):
+        recipe_ids = list(recipe_ids)
+        transaction.on_commit(
+            lambda: log_changes(self.changes, recipe_ids)
+        )
+
+    def _load(self, recipe_ids=None):
+        components = Component.objects.order_by()
+        if recipe_ids is not None:
+            components = components.filter(recipe__in=recipe_ids)
+        rows = {}
+        row_indexes = []
+        column_indexes = []
+        for recipe_id, product_id in components.values_list(
+            'recipe_id', 'product_id'
+        ).iterator():
+            row_indexes.append(rows.setdefault(recipe_id, len(rows)))
+            column_indexes.append(
+                self._columns.setdefault(product_id, len(self._columns))
+            )
+        matrix = sparse.csr_matrix(
+            (
+                np.ones(len(row_indexes), dtype=np.int32),
+                (row_indexes, column_indexes)
+            ),
+            shape=(len(rows), len(self._columns))
+        )
+        matrix.data.fill(1)
+        return np.fromiter(rows, dtype=np.int64, count=len(rows)), matrix
+
+    def _rebuild(self):
+        self._columns = {}
+        self._recipe_ids, self._matrix = self._load()
+
+    def _refresh(self, changed):
+        keep = ~np.isin(self._recipe_ids, list(changed))
+        recipe_ids, rows = self._load(changed)
+        matrix = self._matrix[keep]
+        matrix.resize(matrix.shape[0], len(self._columns))
+        self._recipe_ids = np.concatenate((self._recipe_ids[keep], recipe_ids))
+        self._matrix = sparse.vstack((matrix, rows), format='csr')
+
+    def _current(self):
+        sequence = get_sequence(self.changes)
+        with self._lock, primary_reads():
+            if self._sequence is None or sequence < self._sequence:
+                self._rebuild()
+            elif sequence > self._sequence:
+                changed = read_changes(self.changes, self._sequence, sequence)
+                if changed is None:
+                    self._rebuild()
+                else:
+                    self._refresh(changed)
+            if self._sequence != sequence:
+                self._sizes = np.diff(self._matrix.indptr)
+                self._sequence = sequence
+            return (
+                self._recipe_ids, self._matrix, self._sizes,
+                dict(self._columns)
+            )
+
+    def match(self, product_ids, max_missing):
+        recipe_ids, matrix, sizes, columns = self._current()
+        owned = np.zeros(matrix.shape[1], dtype=np.int32)
+        owned[[
+            columns[product_id] for product_id in product_ids
+            if product_id in columns
+        ]] = 1
+        covered = matrix @ owned
+        missing = sizes - covered
+        found = np.flatnonzero((covered > 0) & (missing <= max_missing))
+        order = np.lexsort(
+            (-recipe_ids[found], -covered[found], missing[found])
+        )
+        return recipe_ids[found[order]].tolist()
+
+
+pantry_matrix = RecipeProductMatrix()
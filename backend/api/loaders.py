@@ -0,0 +1,98 @@
+from collections import defaultdict
+
+from django.db import models
+from rest_framework import serializers
+
+from recipes.models import Basket, FavourRecipe
+from users.models import Follow
+
+
+class RelationshipLoader:
+    sources = {
+        'subscribed': (Follow, 'author_id'),
+        'favorited': (FavourRecipe, 'recipe_id'),
+        'in_shopping_cart': (Basket, 'recipe_id'),
+    }
+
+    def __init__(self, user=None):
+        self.user = user
+        self._pending = defaultdict(set)
+        self._loaded = defaultdict(dict)
+
+    @classmethod
+    def for_context(cls, context):
+        request = context.get('request')
+        if request is None:
+            return cls()
+        loader = getattr(request, '_relationship_loader', None)
+        if loader is None:
+            loader = cls(getattr(request, 'user', None))
+            request._relationship_loader = loader
+        return loader
+
+    @property
+    def is_active(self):
+        return self.user is not None and self.user.is_authenticated
+
+    def prime(self, kind, ids):
+        if not self.is_active:
+            return
+        loaded = self._loaded[kind]
+        self._pending[kind].update(
+            pk for pk in ids if pk is not None and pk not in loaded
+        )
+
+    def load(self, kind, pk):
+        if not self.is_active:
+            return False
+        loaded = self._loaded[kind]
+        if pk not in loaded:
+            self._pending[kind].add(pk)
+            self._flush(kind)
+        return loaded[pk]
+
+    def _flush(self, kind):
+        pending = self._pending.pop(kind, set())
+        if not pending:
+            return
+        model, field = self.sources[kind]
+        found = set(model.objects.filter(
+            user=self.user, **{f'{field}__in': pending}
+        ).values_list(field, flat=True))
+        loaded = self._loaded[kind]
+        for pk in pending:
+            loaded[pk] = pk in found
+
+
+class RelationshipListSerializer(serializers.ListSerializer):
+
+    def to_representation(self, data):
+        if isinstance(data, models.Manager):
+            data = data.all()
+        data = list(data)
+        self.child.prime_relationships(data)
+        return super().to_representation(data)
+
+
+class RelationshipSerializerMixin:
+    relationships = ()
+
+    @property
+    def relationship_loader(self):
+        return RelationshipLoader.for_context(self.context)
+
+    def prime_relationships(self, objs):
+        loader = self.relationship_loader
+        for kind, attr, annotation in self.relationships:
+            loader.prime(kind, [
+                getattr(obj, attr) for obj in objs
+                if not hasattr(obj, annotation)
+            ])
+
+    def get_relationship(self, obj, kind):
+        for relationship_kind, attr, annotation in self.relationships:
+            if relationship_kind == kind:
+                if hasattr(obj, annotation):
+                    return getattr(obj, annotation)
+                return self.relationship_loader.load(kind, getattr(obj, attr))
+        raise KeyError(kind)
@@ -0,0 +1,99 @@
+import csv
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.caching import bump_version
+
+DATA_ROOT = os.path.join(settings.BASE_DIR, 'data')
+
+
+class BulkLoadCommand(BaseCommand):
+    model = None
+    fixture_model = None
+    default_filename = None
+    fields = ()
+    unique_together = ()
+    content_version = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('filename', default=self.default_filename,
+                            nargs='?', type=str)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только посчитать, ничего не записывая')
+
+    def build(self, values):
+        return values
+
+    def read_csv(self, file):
+        for line, row in enumerate(csv.reader(file), start=1):
+            if len(row) != len(self.fields):
+                raise CommandError(f'Строка {line}: ожидалось полей '
+                                   f'{len(self.fields)}, получено {len(row)}')
+            yield dict(zip(self.fields, row))
+
+    def read_json(self, file):
+        for item in json.load(file):
+            if 'model' in item:
+                if item['model'] != self.fixture_model:
+                    continue
+                item = item['fields']
+            yield {field: item.get(field) for field in self.fields}
+
+    def read(self, file, filename):
+        if filename.endswith('.json'):
+            return self.read_json(file)
+        return self.read_csv(file)
+
+    def handle(self, *args, **options):
+        filename = options['filename']
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+        seen = [
+            set(self.model.objects.values_list(*unique))
+            for unique in self.unique_together
+        ]
+        inserted = skipped = 0
+        batch = []
+        try:
+            with open(os.path.join(DATA_ROOT, filename), 'r',
+                      encoding='utf-8') as file, transaction.atomic():
+                for values in self.read(file, filename):
+                    values = self.build(values)
+                    keys = [
+                        tuple(values[field] for field in unique)
+                        for unique in self.unique_together
+                    ]
+                    if any(key in known for key, known in zip(keys, seen)):
+                        skipped += 1
+                        continue
+                    for key, known in zip(keys, seen):
+                        known.add(key)
+                    batch.append(self.model(**values))
+                    inserted += 1
+                    if len(batch) >= batch_size:
+                        self.flush(batch, dry_run)
+                        batch = []
+                self.flush(batch, dry_run)
+        except FileNotFoundError:
+            raise CommandError(
+                f'Файл {filename} не найден в папке /data'
+            )
+        except json.JSONDecodeError as error:
+            raise CommandError(f'Некорректный JSON в {filename}: {error}')
+
+        if inserted and not dry_run:
+            bump_version(self.content_version)
+        prefix = 'Пробный запуск. ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{self.model._meta.verbose_name_plural}: '
+            f'добавлено {inserted}, пропущено {skipped}'
+        ))
+
+    def flush(self, batch, dry_run):
+        if batch and not dry_run:
+            self.model.objects.bulk_create(batch, ignore_conflicts=True)
@@ -1,32 +1,28 @@
-import csv
-import os
+from pytils.translit import slugify
 
-from django.conf import settings
-from django.core.management.base import BaseCommand, CommandError
+from api.management.bulk_load import BulkLoadCommand
+from recipes.models import Tag, free_tag_masks
 
-from recipes.models import Tag
 
-DATA_ROOT = os.path.join(settings.BASE_DIR, 'data')
+class Command(BulkLoadCommand):
+    help = 'Загружает теги из CSV или JSON'
+    model = Tag
+    fixture_model = 'recipes.tag'
+    default_filename = 'tags.csv'
+    fields = ('name', 'color', 'slug')
+    unique_together = (('name',), ('slug',))
+    content_version = 'tags'
 
+    def handle(self, *args, **options):
+        self.masks = free_tag_masks()
+        return super().handle(*args, **options)
 
-class Command(BaseCommand):
-
-    def add_arguments(self, parser):
-        parser.add_argument('filename', default='tags.csv', nargs='?',
-                            type=str)
+    def build(self, values):
+        if not values['slug']:
+            values['slug'] = slugify(values['name'])[:20]
+        return values
 
-    def handle(self, *args, **options):
-        try:
-            with open(os.path.join(DATA_ROOT, options['filename']), 'r',
-                      encoding='utf-8') as f:
-                data = csv.reader(f)
-                for row in data:
-                    Tag.objects.get_or_create(
-                        name=row[0],
-                        color=row[1],
-                        slug=row[2]
-                    )
-        except FileNotFoundError:
-            raise CommandError(
-                'Файл tags.csv не найден в папке /data'
-            )
+    def flush(self, batch, dry_run):
+        for tag in batch:
+            tag.bit_mask = next(self.masks)
+        super().flush(batch, dry_run)
@@ -0,0 +1,34 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from recipes.images import render_variants
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии картинок рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--all', action='store_true', dest='force',
+                            help='Обработать и уже обработанные рецепты')
+
+    def handle(self, *args, **options):
+        recipes = Recipe.objects.exclude(picture='')
+        if not options['force']:
+            recipes = recipes.filter(picture_variants={})
+        pictures = list(recipes.values_list('pk', 'picture'))
+        connections.close_all()
+        names = [name for _, name in pictures]
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            for (pk, name), variants in zip(
+                pictures, pool.map(render_variants, names)
+            ):
+                Recipe.objects.filter(pk=pk, picture=name).update(
+                    picture_variants=variants
+                )
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано картинок: {len(pictures)}'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import backfill
+from recipes.models import FeedEntry
+from users.models import Follow
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок пользователей'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        FeedEntry.objects.all().delete()
+        users = list(Follow.objects.order_by('user_id').values_list(
+            'user_id', flat=True
+        ).distinct())
+        backfill(users)
+        self.stdout.write(self.style.SUCCESS(
+            f'Ленты подписок обновлены: пользователей {len(users)}, '
+            f'записей {FeedEntry.objects.count()}'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.search import update_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pks = list(Recipe.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), batch_size):
+            update_search_vectors(pks[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(
+            f'Поисковый индекс обновлён для {len(pks)} рецептов'
+        ))
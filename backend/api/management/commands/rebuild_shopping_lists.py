@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает или проверяет агрегированные списки покупок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Только проверить расхождения')
+        parser.add_argument('--user', type=int, nargs='*', dest='users',
+                            help='id пользователей для проверки')
+
+    def handle(self, *args, **options):
+        computed = ShoppingListItem.objects.computed()
+        stored = ShoppingListItem.objects.all()
+        if options['users']:
+            computed = computed.filter(user_id__in=options['users'])
+            stored = stored.filter(user_id__in=options['users'])
+
+        with transaction.atomic():
+            expected = {
+                (row['user_id'], row['product_id']): (
+                    row['amount'], row['recipes_count']
+                )
+                for row in computed.iterator()
+            }
+            actual = {
+                (user_id, product_id): (amount, recipes_count)
+                for user_id, product_id, amount, recipes_count
+                in stored.select_for_update().values_list(
+                    'user_id', 'product_id', 'amount', 'recipes_count'
+                ).iterator()
+            }
+            drifted = {
+                key for key in expected.keys() | actual.keys()
+                if expected.get(key) != actual.get(key)
+            }
+            self.stdout.write(
+                f'Позиций в списках покупок: {len(expected)}, '
+                f'расхождений: {len(drifted)}'
+            )
+            if options['verify'] or not drifted:
+                return
+
+            users = {user_id for user_id, _ in drifted}
+            stored.filter(user_id__in=users).delete()
+            ShoppingListItem.objects.bulk_create(
+                (
+                    ShoppingListItem(
+                        user_id=user_id, product_id=product_id,
+                        amount=amount, recipes_count=recipes_count
+                    )
+                    for (user_id, product_id), (amount, recipes_count)
+                    in expected.items() if user_id in users
+                ),
+                batch_size=1000,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'Списки покупок пересобраны для {len(users)} пользователей'
+            ))
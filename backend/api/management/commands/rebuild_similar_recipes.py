@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.models import Recipe, RecipeBand, SimilarRecipe
+from recipes.similarity import update_similar_recipes
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает индекс похожих рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        RecipeBand.objects.all().delete()
+        SimilarRecipe.objects.all().delete()
+        pks = list(Recipe.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), batch_size):
+            update_similar_recipes(pks[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(
+            f'Индекс похожих рецептов обновлён: рецептов {len(pks)}, '
+            f'пар {SimilarRecipe.objects.count() // 2}'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.counters import RECIPE_COUNTERS, USER_COUNTERS, recount
+from recipes.models import Recipe
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики рецептов и пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, counters in (
+            (Recipe, RECIPE_COUNTERS),
+            (CustomUser, USER_COUNTERS),
+        ):
+            pks = list(
+                model.objects.order_by('pk').values_list('pk', flat=True)
+            )
+            for start in range(0, len(pks), batch_size):
+                with transaction.atomic():
+                    recount(
+                        model.objects.filter(
+                            pk__in=pks[start:start + batch_size]
+                        ),
+                        counters
+                    )
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: '
+                f'пересчитано {len(pks)}'
+            ))
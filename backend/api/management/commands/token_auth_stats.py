@@ -0,0 +1,25 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from api.authentication import STATS, stats_key, token_cache
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэша токенов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Обнулить счётчики после вывода')
+
+    def handle(self, *args, **options):
+        stats = token_cache.stats()
+        total = sum(stats.values())
+        hits = stats['local_hits'] + stats['shared_hits']
+        for name in STATS:
+            self.stdout.write(f'{name}: {stats[name]}')
+        rate = hits / total if total else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Доля попаданий: {rate:.1%} из {total} запросов'
+        ))
+        if options['reset']:
+            cache.delete_many([stats_key(name) for name in STATS])
@@ -0,0 +1,136 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.permissions import SAFE_METHODS
+
+from api.routers import choose_replica, pin_to_primary, routing
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+SPACES = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    sql = IN_LIST.sub('(...)', sql)
+    return SPACES.sub(' ', sql.replace('%s', '?')).strip()
+
+
+def view_name(view_func, method):
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        view_class = getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__qualname__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    handler = actions.get(method.lower(), method.lower())
+    return f'{view_class.__name__}.{handler}'
+
+
+class QueryRecorder:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[normalize_sql(sql)] += 1
+
+    def duplicates(self, threshold):
+        return [
+            {'sql': sql, 'count': count}
+            for sql, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+class QueryInstrumentationMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.SQL_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        response['Server-Timing'] = (
+            f'db;dur={recorder.duration * 1000:.2f};'
+            f'desc="{recorder.count} queries", '
+            f'total;dur={total * 1000:.2f}'
+        )
+        if random.random() < settings.SQL_INSTRUMENTATION_SAMPLE_RATE:
+            self.log(request, response, recorder, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.instrumented_view = view_name(view_func, request.method)
+
+    def log(self, request, response, recorder, total):
+        duplicates = recorder.duplicates(
+            settings.SQL_INSTRUMENTATION_DUPLICATES
+        )
+        logger.log(
+            logging.WARNING if duplicates else logging.INFO,
+            json.dumps({
+                'view': getattr(request, 'instrumented_view', None),
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'queries': recorder.count,
+                'sql_ms': round(recorder.duration * 1000, 2),
+                'total_ms': round(total * 1000, 2),
+                'duplicates': duplicates,
+            }, ensure_ascii=False)
+        )
+
+
+class ReplicaRoutingMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {'replica': None, 'wrote': False}
+        token = routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing.reset(token)
+        if state['wrote']:
+            pin_to_primary(request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        if (
+            request.method in SAFE_METHODS
+            and getattr(view_class, 'replica_reads', False)
+        ):
+            routing.get()['replica'] = choose_replica(request)
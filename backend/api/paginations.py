@@ -1,6 +1,178 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class PageLimitNumberPagination(PageNumberPagination):
     page_size_query_param = 'limit'
     page_query_param = 'page'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Некорректный курсор'
+    cursor_fields = ()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = (
+            self.cursor_query_param in request.query_params
+            and isinstance(queryset, QuerySet)
+            and self.supports_keyset(queryset)
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        ordering = self.get_ordering(queryset)
+        self.attnames, self.cursor_fields = zip(*(
+            self.get_cursor_field(queryset, field.lstrip('-'))
+            for field in ordering
+        ))
+        queryset = queryset.order_by(*ordering)
+        self.count = self.estimate_count(queryset)
+
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            queryset = queryset.filter(
+                self.keyset_filter(ordering, self.decode_cursor(cursor))
+            )
+        page = list(queryset[:page_size + 1])
+        self.has_next = len(page) > page_size
+        self.cursor_page = page[:page_size]
+        return self.cursor_page
+
+    def paginate_feed(self, fetch, request):
+        self.cursor_mode = True
+        self.request = request
+        self.attnames = ['pub_date', 'id']
+        self.count = None
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        before = None
+        if cursor:
+            pub_date, pk = self.decode_cursor(cursor)
+            try:
+                before = (parse_datetime(pub_date), int(pk))
+            except (TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            if before[0] is None:
+                raise NotFound(self.invalid_cursor_message)
+        page = fetch(before, page_size + 1)
+        self.has_next = len(page) > page_size
+        self.cursor_page = page[:page_size]
+        return self.cursor_page
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', None),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        last = self.cursor_page[-1]
+        if isinstance(last, dict):
+            values = [last[attname] for attname in self.attnames]
+        elif isinstance(last, tuple):
+            values = list(last)
+        else:
+            values = [getattr(last, attname) for attname in self.attnames]
+        cursor = self.encode_cursor(values)
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param, cursor
+        )
+
+    def get_ordering(self, queryset):
+        ordering = list(
+            queryset.query.order_by or queryset.model._meta.ordering
+        )
+        if not {'id', '-id'} & set(ordering):
+            descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append('-id' if descending else 'id')
+        return ordering
+
+    def supports_keyset(self, queryset):
+        for field in (
+            queryset.query.order_by or queryset.model._meta.ordering
+        ):
+            if not isinstance(field, str):
+                return False
+            name = field.lstrip('-')
+            if name in queryset.query.annotation_select:
+                continue
+            try:
+                queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return False
+        return True
+
+    def get_cursor_field(self, queryset, name):
+        annotation = queryset.query.annotation_select.get(name)
+        if annotation is not None:
+            return name, annotation.output_field
+        field = queryset.model._meta.get_field(name)
+        return field.attname, field
+
+    def keyset_filter(self, ordering, values):
+        condition = Q()
+        for position, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            equal = {
+                previous.lstrip('-'): values[index]
+                for index, previous in enumerate(ordering[:position])
+            }
+            condition |= Q(**equal, **{f'{name}__{lookup}': values[position]})
+        return condition
+
+    def encode_cursor(self, values):
+        payload = json.dumps(values, default=str).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padding = '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.attnames):
+            raise NotFound(self.invalid_cursor_message)
+        if not self.cursor_fields:
+            return values
+        try:
+            values = [
+                field.to_python(value)
+                for field, value in zip(self.cursor_fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def estimate_count(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']['Plan Rows']
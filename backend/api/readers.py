@@ -0,0 +1,107 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from rest_framework.response import Response
+
+from api.serializers import image_variant_urls
+from recipes.models import Component, Recipe
+
+RECIPE_VALUES = (
+    'id', 'pub_date', 'title', 'text', 'cooking_time', 'picture',
+    'picture_variants', 'favorites_count', 'is_favorited',
+    'is_in_shopping_cart', 'author_is_subscribed', 'author_id',
+    'author__email', 'author__username', 'author__first_name',
+    'author__last_name', 'author__followers_count',
+)
+
+
+def recipe_tags(recipe_ids):
+    tags = defaultdict(list)
+    for row in Recipe.tags.through.objects.filter(
+        recipe__in=recipe_ids
+    ).order_by('tag__name').values(
+        'recipe_id', 'tag_id', 'tag__name', 'tag__color', 'tag__slug'
+    ):
+        tags[row['recipe_id']].append({
+            'id': row['tag_id'],
+            'name': row['tag__name'],
+            'color': row['tag__color'],
+            'slug': row['tag__slug'],
+        })
+    return tags
+
+
+def recipe_ingredients(recipe_ids):
+    ingredients = defaultdict(list)
+    for row in Component.objects.filter(
+        recipe__in=recipe_ids
+    ).order_by('pk').values(
+        'recipe_id', 'product_id', 'product__name',
+        'product__measurement_unit', 'amount'
+    ):
+        ingredients[row['recipe_id']].append({
+            'id': row['product_id'],
+            'name': row['product__name'],
+            'measurement_unit': row['product__measurement_unit'],
+            'amount': row['amount'],
+        })
+    return ingredients
+
+
+def picture_url(name, request):
+    if not name:
+        return None
+    url = default_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def recipe_data(rows, request):
+    recipe_ids = [row['id'] for row in rows]
+    tags = recipe_tags(recipe_ids)
+    ingredients = recipe_ingredients(recipe_ids)
+    return [
+        {
+            'id': row['id'],
+            'tags': tags[row['id']],
+            'author': {
+                'email': row['author__email'],
+                'id': row['author_id'],
+                'username': row['author__username'],
+                'first_name': row['author__first_name'],
+                'last_name': row['author__last_name'],
+                'is_subscribed': bool(row['author_is_subscribed']),
+                'followers_count': row['author__followers_count'],
+            },
+            'ingredients': ingredients[row['id']],
+            'is_favorited': bool(row['is_favorited']),
+            'is_in_shopping_cart': bool(row['is_in_shopping_cart']),
+            'name': row['title'],
+            'image': picture_url(row['picture'], request),
+            'text': row['text'],
+            'cooking_time': row['cooking_time'],
+            'favorites_count': row['favorites_count'],
+            'image_variants': image_variant_urls(
+                row['picture_variants'], request
+            ),
+        }
+        for row in rows
+    ]
+
+
+class FastRecipeListMixin:
+
+    def list(self, request, *args, **kwargs):
+        if not settings.RECIPE_FAST_READ:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.prefetch_related(None).values(*RECIPE_VALUES, *(
+            name for name in queryset.query.annotation_select
+            if name not in RECIPE_VALUES
+        ))
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(recipe_data(list(rows), request))
+        return self.get_paginated_response(recipe_data(page, request))
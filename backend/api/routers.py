@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA_LAG_SQL = '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+'''
+
+routing = ContextVar('database_routing', default=None)
+
+
+def replica_lag(alias):
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        if connection.vendor != 'postgresql':
+            cursor.execute('SELECT 1')
+            return 0.0
+        cursor.execute(REPLICA_LAG_SQL)
+        lag = cursor.fetchone()[0]
+    return float(lag or 0)
+
+
+class ReplicaHealth:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked = {}
+        self._healthy = {}
+
+    def check(self, alias):
+        try:
+            lag = replica_lag(alias)
+        except DatabaseError:
+            logger.warning('Реплика %s недоступна', alias, exc_info=True)
+            return False
+        if lag > settings.REPLICA_MAX_LAG:
+            logger.warning('Реплика %s отстаёт на %.1f с', alias, lag)
+            return False
+        return True
+
+    def healthy_aliases(self):
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                alias for alias in settings.DATABASE_REPLICAS
+                if now - self._checked.get(alias, -float('inf'))
+                >= settings.REPLICA_CHECK_INTERVAL
+            ]
+            for alias in due:
+                self._checked[alias] = now
+        for alias in due:
+            self._healthy[alias] = self.check(alias)
+        return [
+            alias for alias in settings.DATABASE_REPLICAS
+            if self._healthy.get(alias)
+        ]
+
+    def reset(self):
+        with self._lock:
+            self._checked.clear()
+            self._healthy.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+PIN_COOKIE = 'replica_pin'
+
+
+def pin_digest(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+
+def pin_to_primary(request, response):
+    digest = pin_digest(request)
+    if digest is None:
+        return
+    cache.set(f'replica_pin:{digest}', 1, settings.REPLICA_STICKY_SECONDS)
+    response.set_signed_cookie(
+        PIN_COOKIE, digest, salt=PIN_COOKIE,
+        max_age=settings.REPLICA_STICKY_SECONDS, httponly=True,
+        samesite='Lax'
+    )
+
+
+def is_pinned(request):
+    digest = pin_digest(request)
+    if digest is None:
+        return False
+    cookie = request.get_signed_cookie(
+        PIN_COOKIE, default=None, salt=PIN_COOKIE,
+        max_age=settings.REPLICA_STICKY_SECONDS
+    )
+    return (
+        cookie == digest
+        or cache.get(f'replica_pin:{digest}') is not None
+    )
+
+
+def choose_replica(request):
+    if is_pinned(request):
+        return None
+    aliases = replica_health.healthy_aliases()
+    return random.choice(aliases) if aliases else None
+
+
+def replica_staleness():
+    state = routing.get()
+    if state is None or state['replica'] is None:
+        return 0
+    return settings.REPLICA_MAX_LAG
+
+
+@contextmanager
+def primary_reads():
+    state = routing.get()
+    if state is None:
+        yield
+        return
+    replica, state['replica'] = state['replica'], None
+    try:
+        yield
+    finally:
+        state['replica'] = replica
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = routing.get()
+        if (
+            state is not None and state['replica'] is not None
+            and model._meta.app_label in settings.REPLICA_APPS
+        ):
+            return state['replica']
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = routing.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
@@ -1,8 +1,16 @@
 from drf_extra_fields.fields import Base64ImageField
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
 from rest_framework import serializers
 
-from recipes.models import Component, Product, Recipe, Tag
+from api.loaders import RelationshipListSerializer, RelationshipSerializerMixin
+from api.indexes import pantry_matrix
+from recipes.feed import fan_out
+from recipes.images import save_picture, schedule_picture_processing
+from recipes.models import Component, Product, Recipe, ShoppingListItem, Tag
+from recipes.search import update_search_vectors
+from recipes.similarity import update_similar_recipes
 from users.models import CustomUser, Follow
 
 
@@ -14,7 +22,7 @@ class TagSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Tag
-        fields = '__all__'
+        fields = ('id', 'name', 'color', 'slug')
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -41,7 +49,8 @@ class ComponentSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(RelationshipSerializerMixin,
+                           serializers.ModelSerializer):
     email = serializers.EmailField(max_length=254, allow_blank=False)
     username = serializers.CharField(max_length=150, allow_blank=False)
     first_name = serializers.CharField(max_length=150)
@@ -49,23 +58,32 @@ class CustomUserSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField(
         method_name='get_is_subscribed'
     )
+    followers_count = serializers.IntegerField(read_only=True)
+
+    relationships = (('subscribed', 'id', 'is_subscribed'),)
 
     class Meta:
         model = CustomUser
         fields = ('email', 'id', 'username', 'first_name',
-                  'last_name', 'is_subscribed')
+                  'last_name', 'is_subscribed', 'followers_count')
+        list_serializer_class = RelationshipListSerializer
 
     def get_is_subscribed(self, obj):
-        user = None
+        return self.get_relationship(obj, 'subscribed')
+
+
+class RecipeRepresentationMixin:
+
+    def to_representation(self, instance):
         request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            user = request.user
-        if user and user.is_authenticated:
-            return Follow.objects.filter(user=user, author=obj.id).exists()
-        return False
+        instance = Recipe.objects.with_related().with_user_flags(
+            getattr(request, 'user', None)
+        ).get(pk=instance.pk)
+        return RecipeReadSerializer(instance, context=self.context).data
 
 
-class RecipeWriteSerializer(serializers.ModelSerializer):
+class RecipeWriteSerializer(RecipeRepresentationMixin,
+                            serializers.ModelSerializer):
     name = serializers.CharField(source='title')
     image = Base64ImageField(
         source='picture',
@@ -75,12 +93,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         child=serializers.DictField(child=serializers.CharField()),
         source='components'
     )
-    tags = serializers.ListField(
-        child=serializers.SlugRelatedField(
-            slug_field='id',
-            queryset=Tag.objects.all(),
-        ),
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
 
     class Meta:
         model = Recipe
@@ -89,53 +102,162 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             'image', 'name', 'text', 'cooking_time',
         )
 
+    def validate_tags(self, tag_ids):
+        tag_ids = list(dict.fromkeys(tag_ids))
+        missing = set(tag_ids) - set(Tag.objects.in_bulk(tag_ids))
+        if missing:
+            raise serializers.ValidationError(
+                f'Теги не найдены: {", ".join(map(str, sorted(missing)))}'
+            )
+        return tag_ids
+
     def validate(self, data):
-        components = data['components']
-        unique_components_data = set()
-        for component in components:
-            component_id = component["id"]
-            if component_id in unique_components_data:
+        if 'components' not in data:
+            return data
+        amounts = {}
+        for component in data['components']:
+            try:
+                product_id = int(component['id'])
+                amount = int(component['amount'])
+            except (KeyError, TypeError, ValueError):
+                raise serializers.ValidationError(
+                    'Укажите id и количество ингредиента числами.'
+                )
+            if product_id in amounts:
                 raise serializers.ValidationError(
                     'Ингредиент возможно использовать только один раз.'
                 )
-            if int(component['amount']) < 1:
+            if amount < 1:
                 raise serializers.ValidationError(
                     'Убедитесь, что значение количества ингредиента больше 1'
                 )
-            unique_components_data.add(component_id)
-        return data
-
-    def add_components(self, recipe, components):
-        new_components = [
-            Component(
-                recipe=recipe,
-                product=get_object_or_404(Product, id=component['id']),
-                amount=component['amount'],
+            amounts[product_id] = amount
+        missing = set(amounts) - set(Product.objects.in_bulk(list(amounts)))
+        if missing:
+            raise serializers.ValidationError(
+                'Ингредиенты не найдены: '
+                f'{", ".join(map(str, sorted(missing)))}'
             )
-            for component in components
-        ]
-        Component.objects.bulk_create(new_components)
+        data['components'] = amounts
+        return data
 
+    @transaction.atomic
     def create(self, validated_data):
-        components = validated_data.pop('components')
+        amounts = validated_data.pop('components')
         tags = validated_data.pop('tags')
+        validated_data['picture'] = save_picture(validated_data['picture'])
         recipe = Recipe.objects.create(**validated_data)
-        recipe.save()
         recipe.tags.set(tags)
-        self.add_components(recipe, components)
+        Component.objects.bulk_create(
+            Component(recipe=recipe, product_id=product_id, amount=amount)
+            for product_id, amount in amounts.items()
+        )
+        pantry_matrix.mark_changed([recipe.pk])
+        update_search_vectors([recipe.pk])
+        update_similar_recipes([recipe.pk])
+        fan_out(recipe)
+        schedule_picture_processing(recipe)
         return recipe
 
+    def update_tags(self, instance, tag_ids):
+        current = set(instance.tags.values_list('id', flat=True))
+        removed = current - set(tag_ids)
+        added = [tag_id for tag_id in tag_ids if tag_id not in current]
+        if removed:
+            instance.tags.remove(*removed)
+        if added:
+            instance.tags.add(*added)
+
+    def update_components(self, instance, amounts):
+        existing = {
+            component.product_id: component
+            for component in instance.recipe_components.all()
+        }
+        old_amounts = {
+            product_id: component.amount
+            for product_id, component in existing.items()
+        }
+        removed = [
+            component.pk for product_id, component in existing.items()
+            if product_id not in amounts
+        ]
+        changed = []
+        added = []
+        for product_id, amount in amounts.items():
+            component = existing.get(product_id)
+            if component is None:
+                added.append(Component(
+                    recipe=instance, product_id=product_id, amount=amount
+                ))
+            elif component.amount != amount:
+                component.amount = amount
+                changed.append(component)
+        if removed:
+            Component.objects.filter(pk__in=removed).delete()
+        if changed:
+            Component.objects.bulk_update(changed, ('amount',))
+        if added:
+            Component.objects.bulk_create(added)
+            pantry_matrix.mark_changed([instance.pk])
+        if removed or changed or added:
+            ShoppingListItem.objects.change_components(
+                instance, old_amounts, amounts
+            )
+
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.tags.clear()
-        tags = validated_data.pop('tags')
-        instance.tags.set(tags)
-        Component.objects.filter(recipe=instance).delete()
-        components = validated_data.pop('components')
-        self.add_components(instance, components)
-        return super().update(instance, validated_data)
+        related_changed = (
+            'tags' in validated_data or 'components' in validated_data
+        )
+        if 'tags' in validated_data:
+            self.update_tags(instance, validated_data.pop('tags'))
+        if 'components' in validated_data:
+            self.update_components(
+                instance, validated_data.pop('components')
+            )
+        if 'picture' in validated_data:
+            picture = save_picture(validated_data['picture'])
+            if picture == instance.picture.name:
+                del validated_data['picture']
+            else:
+                validated_data['picture'] = picture
+                validated_data['picture_variants'] = {}
+        instance = super().update(instance, validated_data)
+        update_search_vectors([instance.pk])
+        if related_changed:
+            update_similar_recipes([instance.pk])
+        if 'picture' in validated_data:
+            schedule_picture_processing(instance)
+        return instance
+
+
+class RecipeImageSerializer(RecipeRepresentationMixin,
+                            serializers.ModelSerializer):
+    image = Base64ImageField(
+        source='picture',
+        max_length=None, use_url=True
+    )
 
-    def to_representation(self, instance):
-        return RecipeReadSerializer(instance, context=self.context).data
+    class Meta:
+        model = Recipe
+        fields = ('image',)
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        picture = save_picture(validated_data['picture'])
+        if picture != instance.picture.name:
+            instance.picture = picture
+            instance.picture_variants = {}
+            instance.save(update_fields=('picture', 'picture_variants'))
+            schedule_picture_processing(instance)
+        return instance
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=settings.BULK_RECIPES_LIMIT
+    )
 
 
 class DynamicFieldsModelSerializer(serializers.ModelSerializer):
@@ -150,7 +272,20 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
                 self.fields.pop(field_name)
 
 
-class RecipeReadSerializer(DynamicFieldsModelSerializer):
+def image_variant_urls(picture_variants, request):
+    variants = {}
+    for variant, paths in picture_variants.items():
+        variants[variant] = {}
+        for image_format, path in paths.items():
+            url = default_storage.url(path)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            variants[variant][image_format] = url
+    return variants
+
+
+class RecipeReadSerializer(RelationshipSerializerMixin,
+                           DynamicFieldsModelSerializer):
     name = serializers.CharField(source='title')
     image = Base64ImageField(max_length=None, use_url=True, source='picture')
     author = CustomUserSerializer(read_only=True)
@@ -169,6 +304,16 @@ class RecipeReadSerializer(DynamicFieldsModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField(
         method_name='get_is_in_shopping_cart'
     )
+    favorites_count = serializers.IntegerField(read_only=True)
+    image_variants = serializers.SerializerMethodField(
+        method_name='get_image_variants'
+    )
+
+    relationships = (
+        ('favorited', 'id', 'is_favorited'),
+        ('in_shopping_cart', 'id', 'is_in_shopping_cart'),
+        ('subscribed', 'author_id', 'author_is_subscribed'),
+    )
 
     class Meta:
         model = Recipe
@@ -177,27 +322,26 @@ class RecipeReadSerializer(DynamicFieldsModelSerializer):
             'ingredients',
             'is_favorited',
             'is_in_shopping_cart',
-            'name', 'image', 'text', 'cooking_time'
+            'name', 'image', 'text', 'cooking_time',
+            'favorites_count', 'image_variants'
         )
+        list_serializer_class = RelationshipListSerializer
 
-    def get_user(self):
-        user = None
-        request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            user = request.user
-        return user
+    def to_representation(self, instance):
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
+    def get_image_variants(self, obj):
+        return image_variant_urls(
+            obj.picture_variants, self.context.get('request')
+        )
 
     def get_is_favorited(self, obj):
-        user = self.get_user()
-        if user and user.is_authenticated:
-            return obj.favourite.filter(user=user).exists()
-        return False
+        return self.get_relationship(obj, 'favorited')
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.get_user()
-        if user and user.is_authenticated:
-            return obj.basket_recipes.filter(user=user).exists()
-        return False
+        return self.get_relationship(obj, 'in_shopping_cart')
 
 
 class SubscribeSerializer(serializers.ModelSerializer):
@@ -228,20 +372,30 @@ class SubscribeSerializer(serializers.ModelSerializer):
     recipes_count = serializers.SerializerMethodField(
         method_name='get_recipes_count'
     )
+    followers_count = serializers.IntegerField(
+        source='author.followers_count',
+        read_only=True
+    )
 
     recipe_fields = ('id', 'name', 'image', 'cooking_time')
 
     class Meta:
         model = Follow
         fields = ('email', 'id', 'username', 'first_name',
-                  'last_name', 'is_subscribed', 'recipes', 'recipes_count')
+                  'last_name', 'is_subscribed', 'recipes', 'recipes_count',
+                  'followers_count')
 
     def get_is_subscribed(self, obj):
-        is_subscribed = Follow.objects.filter(
-            user=obj.user, author=obj.author).exists()
-        return is_subscribed
+        return True
 
     def get_recipes(self, obj):
+        recipes_by_author = self.context.get('recipes_by_author')
+        if recipes_by_author is not None:
+            serializer = RecipeReadSerializer(
+                recipes_by_author.get(obj.author_id, []), many=True,
+                fields=self.recipe_fields
+            )
+            return serializer.data
         request = self.context['request']
         recipes_per_user = None
         if 'recipes_limit' in request.query_params:
@@ -254,4 +408,4 @@ class SubscribeSerializer(serializers.ModelSerializer):
         return serializer.data
 
     def get_recipes_count(self, obj):
-        return obj.author.recipes.count()
+        return obj.author.recipes_count
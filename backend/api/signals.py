@@ -0,0 +1,110 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+from api.caching import bump_version, invalidate
+from api.indexes import pantry_matrix
+from recipes.models import Component, Product, Recipe, Tag
+from recipes.search import update_search_vectors
+from users.models import CustomUser
+
+
+@receiver((post_save, post_delete), sender=Product)
+def bump_products_version(**kwargs):
+    bump_version('products')
+
+
+@receiver(post_save, sender=Product)
+def update_product_recipes_search(instance, created, **kwargs):
+    if not created:
+        update_search_vectors(
+            Recipe.objects.filter(ingredients=instance).values('pk')
+        )
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def bump_tags_version(**kwargs):
+    bump_version('tags')
+
+
+@receiver((post_save, post_delete), sender=Component)
+def mark_recipe_components_changed(instance, **kwargs):
+    pantry_matrix.mark_changed((instance.recipe_id,))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_recipe_tag_masks(instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        recipes = Recipe.objects.filter(pk=instance.pk)
+    elif action == 'post_clear':
+        recipes = Recipe.objects.with_tags((instance.bit_mask,))
+    else:
+        recipes = Recipe.objects.filter(pk__in=pk_set)
+    recipes.update_tag_masks()
+
+
+@receiver(post_delete, sender=Tag)
+def clear_deleted_tag_masks(instance, **kwargs):
+    Recipe.objects.with_tags((instance.bit_mask,)).update_tag_masks()
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+def invalidate_recipe(instance, **kwargs):
+    invalidate('recipes', f'recipe:{instance.pk}')
+
+
+@receiver((post_save, post_delete), sender=Component)
+def invalidate_recipe_components(instance, **kwargs):
+    invalidate('recipes', f'recipe:{instance.recipe_id}')
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate('recipes', f'recipe:{instance.pk}')
+    elif action == 'post_clear':
+        invalidate('recipes', f'tag:{instance.pk}')
+    else:
+        invalidate('recipes', *(f'recipe:{pk}' for pk in pk_set))
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_tag(instance, **kwargs):
+    invalidate(f'tag:{instance.pk}')
+
+
+@receiver(post_delete, sender=Tag)
+def invalidate_deleted_tag(instance, **kwargs):
+    invalidate('recipes', f'tag:{instance.pk}')
+
+
+@receiver((post_save, post_delete), sender=Product)
+def invalidate_product(instance, **kwargs):
+    invalidate(f'product:{instance.pk}')
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_author(instance, **kwargs):
+    invalidate(f'author:{instance.pk}')
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(instance, **kwargs):
+    key = instance.key
+    transaction.on_commit(lambda: token_cache.forget((key,)))
+
+
+@receiver(post_save, sender=CustomUser)
+def forget_user_tokens(instance, created, update_fields, **kwargs):
+    if created or update_fields and set(update_fields) <= {'last_login'}:
+        return
+    keys = list(
+        Token.objects.filter(user=instance).values_list('key', flat=True)
+    )
+    transaction.on_commit(lambda: token_cache.forget(keys))
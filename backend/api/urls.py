@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -14,3 +15,14 @@ router_v1.register('recipes', RecipeViewSet)
 urlpatterns = [
     path('', include(router_v1.urls)),
 ]
+
+if settings.ASYNC_VIEWS:
+    from api import async_views
+
+    urlpatterns = [
+        path('recipes/download_shopping_cart/',
+             async_views.download_shopping_cart,
+             name='recipes-txt_basket'),
+        path('recipes/<int:pk>/image/',
+             async_views.recipe_image, name='recipes-image'),
+    ] + urlpatterns
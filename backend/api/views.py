@@ -1,5 +1,10 @@
-﻿from django.db.models import Sum
-from django.http import HttpResponse
+﻿from collections import Counter, defaultdict
+from itertools import chain
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
@@ -9,17 +14,45 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
+from api.caching import (AnonymousCacheMixin, VersionedCacheMixin,
+                         invalidate)
+from api.counters import RECIPE_COUNTERS, USER_COUNTERS, bump, recount
+from api.exports import (EXPORT_CHUNK_SIZE, EXPORT_FORMATS,
+                         ExportContentNegotiation)
 from api.filters import ProductSearchFilter, RecipeQueryParamFilter
+from api.indexes import pantry_matrix, product_index
 from api.paginations import PageLimitNumberPagination
 from api.permissions import AuthorOrReadOnly
+from api.readers import FastRecipeListMixin
 from api.serializers import (CustomUserSerializer, ProductSerializer,
+                             RecipeIdsSerializer, RecipeImageSerializer,
                              RecipeReadSerializer, RecipeWriteSerializer,
                              SubscribeSerializer, TagSerializer)
-from recipes.models import (Basket, Component, FavourRecipe, Product, Recipe,
-                            Tag)
+from recipes.feed import backfill, backfill_followers, feed_keys, prune
+from recipes.models import (Basket, FavourRecipe, Product, Recipe,
+                            ShoppingListItem, Tag, recipe_amounts)
 from users.models import CustomUser, Follow
 
 
+def recipes_by_author(follows, recipes_limit=None):
+    recipes = Recipe.objects.top_per_author(
+        [follow.author_id for follow in follows],
+        int(recipes_limit) if recipes_limit else None
+    )
+    grouped = defaultdict(list)
+    for recipe in recipes:
+        grouped[recipe.author_id].append(recipe)
+    return grouped
+
+
+def shopping_list_rows(user):
+    return ShoppingListItem.objects.filter(user=user).values(
+        'product__name',
+        'product__measurement_unit',
+        quantity=F('amount'),
+    ).order_by('product__name')
+
+
 class CustomUserViewSet(UserViewSet):
     queryset = CustomUser.objects.all().prefetch_related('recipes')
     serializer_class = CustomUserSerializer
@@ -27,6 +60,10 @@ class CustomUserViewSet(UserViewSet):
     http_method_names = ('get', 'post', 'delete')
     lookup_field = 'pk'
     lookup_value_regex = '[0-9]'
+    replica_reads = True
+
+    def get_instance(self):
+        return CustomUser.objects.get(pk=self.request.user.pk)
 
     @action(
         detail=False, methods=('get', ),
@@ -36,12 +73,17 @@ class CustomUserViewSet(UserViewSet):
     )
     def get_subscriptions(self, request):
         user = request.user
-        queryset = Follow.objects.filter(user=user)
+        queryset = Follow.objects.filter(user=user).select_related('author')
         pages = self.paginate_queryset(queryset)
         serializer = SubscribeSerializer(
             pages,
             many=True,
-            context={'request': request}
+            context={
+                'request': request,
+                'recipes_by_author': recipes_by_author(
+                    pages, request.query_params.get('recipes_limit')
+                ),
+            }
         )
         return self.get_paginated_response(serializer.data)
 
@@ -52,6 +94,7 @@ class CustomUserViewSet(UserViewSet):
         permission_classes=(IsAuthenticated, ),
         serializer_class=SubscribeSerializer,
     )
+    @transaction.atomic
     def add_del_sibscription(self, request, pk=None):
         if request.method == 'POST':
             return self.add_follow(request, pk)
@@ -69,6 +112,9 @@ class CustomUserViewSet(UserViewSet):
 
         follow, subs = Follow.objects.get_or_create(user=user, author=author)
         if subs:
+            bump(CustomUser.objects.filter(pk=author.pk), followers_count=1)
+            invalidate(f'author:{author.pk}')
+            backfill((user.pk,))
             serializer = SubscribeSerializer(
                 follow, context={'request': request}
             )
@@ -82,29 +128,102 @@ class CustomUserViewSet(UserViewSet):
         author = get_object_or_404(CustomUser, pk=pk)
         follow = get_object_or_404(Follow, user=user, author=author)
         follow.delete()
+        prune(user.pk, author.pk)
+        bump(CustomUser.objects.filter(pk=author.pk), followers_count=-1)
+        invalidate(f'author:{author.pk}')
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class ProductViewSet(ReadOnlyModelViewSet):
+class ProductViewSet(VersionedCacheMixin, ReadOnlyModelViewSet):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     filter_backends = (ProductSearchFilter,)
     search_fields = ('^name',)
     http_method_names = ('get',)
     pagination_class = None
+    cache_version = 'products'
+    replica_reads = True
+
+    def list(self, request, *args, **kwargs):
+        if not request.query_params.get(ProductSearchFilter.search_param):
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(self.search, request)
+
+    def search(self, request):
+        name = request.query_params.get(ProductSearchFilter.search_param)
+        try:
+            limit = int(request.query_params.get(
+                'limit', settings.INGREDIENTS_SEARCH_LIMIT
+            ))
+        except ValueError:
+            return Response({
+                'errors': 'Параметр limit должен быть числом'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response(product_index.search(name, max(limit, 0)))
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(AnonymousCacheMixin, FastRecipeListMixin,
+                    viewsets.ModelViewSet):
     permission_classes = (AuthorOrReadOnly, )
     pagination_class = PageLimitNumberPagination
+    replica_reads = True
     queryset = Recipe.objects.all()
     filter_backends = (DjangoFilterBackend, )
     filter_class = RecipeQueryParamFilter
 
     http_method_names = ('get', 'post', 'put', 'patch', 'delete', )
+    user_counters = {
+        FavourRecipe: 'favorites_count',
+        Basket: 'basket_count',
+    }
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve', 'pantry', 'feed'):
+            queryset = queryset.with_related().with_user_flags(
+                self.request.user
+            )
+        return queryset
+
+    def get_cache_tags(self, data):
+        if self.action == 'list':
+            recipes, tags = data['results'], {'recipes'}
+        else:
+            recipes, tags = [data], set()
+        for recipe in recipes:
+            tags.add(f'recipe:{recipe["id"]}')
+            tags.add(f'author:{recipe["author"]["id"]}')
+            tags.update(f'tag:{tag["id"]}' for tag in recipe['tags'])
+            tags.update(
+                f'product:{component["id"]}'
+                for component in recipe['ingredients']
+            )
+        return tags
+
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
+        bump(CustomUser.objects.filter(pk=self.request.user.pk),
+             recipes_count=1)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        ShoppingListItem.objects.change_components(
+            instance, recipe_amounts(instance), {}
+        )
+        holders = set(chain(
+            instance.favourite.values_list('user_id', flat=True),
+            instance.basket_recipes.values_list('user_id', flat=True),
+        ))
+        instance.delete()
+        bump(CustomUser.objects.filter(pk=instance.author_id),
+             recipes_count=-1)
+        backfill_followers(instance.author_id)
+        if holders:
+            recount(CustomUser.objects.filter(pk__in=holders), {
+                counter: USER_COUNTERS[counter]
+                for counter in self.user_counters.values()
+            })
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -114,24 +233,111 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def add_recipe(self, request, model, pk=None):
         recipe = get_object_or_404(Recipe, id=pk)
         model.objects.create(user=self.request.user, recipe=recipe)
+        self.bump_counters(model, request.user, pk, 1)
+        if model is Basket:
+            ShoppingListItem.objects.add_recipe(request.user, recipe)
         serializer = RecipeReadSerializer(recipe, fields='__all__')
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def bump_counters(self, model, user, pk, delta):
+        bump(CustomUser.objects.filter(pk=user.pk),
+             **{self.user_counters[model]: delta})
+        if model is FavourRecipe:
+            bump(Recipe.objects.filter(pk=pk), favorites_count=delta)
+            invalidate(f'recipe:{pk}')
+
     def del_recipe(self, request, model, pk=None):
         user = request.user
-        obj = model.objects.filter(user=user, recipe__id=pk)
-        if obj.exists():
-            obj.delete()
+        deleted, _ = model.objects.filter(user=user, recipe__id=pk).delete()
+        if deleted:
+            self.bump_counters(model, user, pk, -deleted)
+            if model is Basket:
+                ShoppingListItem.objects.remove_recipes(
+                    user, {int(pk): deleted}
+                )
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response({
             'errors': 'Невозможно удалить несуществующий рецепт'
         }, status=status.HTTP_400_BAD_REQUEST)
 
+    def bulk_add(self, user, model, ids):
+        existing = set(model.objects.filter(
+            user=user, recipe__in=ids
+        ).values_list('recipe_id', flat=True))
+        added = [pk for pk in ids if pk not in existing]
+        model.objects.bulk_create(
+            [model(user=user, recipe_id=pk) for pk in added],
+            ignore_conflicts=True
+        )
+        if model is Basket:
+            ShoppingListItem.objects.add_recipes(user, dict.fromkeys(added, 1))
+        return added
+
+    def bulk_remove(self, user, model, ids):
+        items = model.objects.filter(user=user, recipe__in=ids)
+        removed = Counter(items.values_list('recipe_id', flat=True))
+        items.delete()
+        if model is Basket:
+            ShoppingListItem.objects.remove_recipes(user, removed)
+        return removed
+
+    def bulk_change(self, request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        found = set(
+            Recipe.objects.filter(pk__in=ids).values_list('pk', flat=True)
+        )
+        valid = [pk for pk in ids if pk in found]
+        if request.method == 'POST':
+            changed = self.bulk_add(request.user, model, valid)
+            statuses = ('added', 'exists')
+        else:
+            changed = self.bulk_remove(request.user, model, valid)
+            statuses = ('removed', 'absent')
+        if changed:
+            counter = self.user_counters[model]
+            recount(CustomUser.objects.filter(pk=request.user.pk),
+                    {counter: USER_COUNTERS[counter]})
+            if model is FavourRecipe:
+                recount(Recipe.objects.filter(pk__in=changed),
+                        RECIPE_COUNTERS)
+                invalidate(*(f'recipe:{pk}' for pk in changed))
+        return Response({'results': [
+            {
+                'id': pk,
+                'status': (
+                    'not_found' if pk not in found
+                    else statuses[0] if pk in changed else statuses[1]
+                ),
+            }
+            for pk in ids
+        ]})
+
+    @action(
+        detail=False, methods=('post', 'delete'),
+        permission_classes=(IsAuthenticated,),
+        url_path='shopping_cart', url_name='basket_bulk',
+    )
+    @transaction.atomic
+    def bulk_shopping_cart(self, request):
+        return self.bulk_change(request, Basket)
+
+    @action(
+        detail=False, methods=('post', 'delete'),
+        permission_classes=(IsAuthenticated,),
+        url_path='favorite', url_name='favorite_bulk',
+    )
+    @transaction.atomic
+    def bulk_favorite(self, request):
+        return self.bulk_change(request, FavourRecipe)
+
     @action(
         detail=True, methods=('post', 'delete'),
         permission_classes=(IsAuthenticated,),
         url_path='shopping_cart', url_name='basket',
     )
+    @transaction.atomic
     def shopping_cart(self, request, pk=None):
         if request.method == 'DELETE':
             return self.del_recipe(request, Basket, pk)
@@ -144,6 +350,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,),
         url_path='favorite', url_name='favorite',
     )
+    @transaction.atomic
     def add_del_favorite(self, request, pk=None):
         if request.method == 'POST':
             return self.add_recipe(request, FavourRecipe, pk)
@@ -151,41 +358,131 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return self.del_recipe(request, FavourRecipe, pk)
         return None
 
+    @action(
+        detail=True, methods=('get',),
+        url_path='similar', url_name='similar',
+    )
+    def similar(self, request, pk=None):
+        recipe = self.get_object()
+        try:
+            limit = min(
+                int(request.query_params.get(
+                    'limit', settings.SIMILAR_RECIPES_LIMIT
+                )),
+                settings.SIMILAR_RECIPES_LIMIT
+            )
+        except ValueError:
+            return Response({
+                'errors': 'Параметр limit должен быть числом'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        recipes = Recipe.objects.filter(similar_to__recipe=recipe).order_by(
+            '-similar_to__score', '-id'
+        )[:max(limit, 0)]
+        serializer = RecipeReadSerializer(
+            recipes, many=True, context=self.get_serializer_context(),
+            fields=SubscribeSerializer.recipe_fields
+        )
+        return Response(serializer.data)
+
+    @action(
+        detail=True, methods=('put',),
+        url_path='image', url_name='image',
+    )
+    def image(self, request, pk=None):
+        serializer = RecipeImageSerializer(
+            self.get_object(), data=request.data,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+    @action(
+        detail=False, methods=('get',),
+        url_path='pantry', url_name='pantry',
+    )
+    def pantry(self, request):
+        try:
+            product_ids = {
+                int(product_id)
+                for value in request.query_params.getlist('products')
+                for product_id in value.split(',') if product_id
+            }
+            max_missing = int(request.query_params.get(
+                'max_missing', settings.PANTRY_MAX_MISSING
+            ))
+        except ValueError:
+            return Response({
+                'errors': 'Параметры products и max_missing должны быть '
+                          'числами'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not product_ids:
+            return Response({
+                'errors': 'Укажите продукты в параметре products'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        page = self.paginate_queryset(
+            pantry_matrix.match(product_ids, max(max_missing, 0))
+        )
+        recipes = self.get_queryset().in_bulk(page)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in page if pk in recipes], many=True
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False, methods=('get',),
+        permission_classes=(IsAuthenticated,),
+        url_path='feed', url_name='feed',
+    )
+    def feed(self, request):
+        page = self.paginator.paginate_feed(
+            lambda before, limit: feed_keys(request.user, before, limit),
+            request
+        )
+        recipes = self.get_queryset().in_bulk([pk for _, pk in page])
+        serializer = self.get_serializer(
+            [recipes[pk] for _, pk in page if pk in recipes], many=True
+        )
+        return self.get_paginated_response(serializer.data)
+
     @action(
         detail=False, methods=('get',),
         permission_classes=(IsAuthenticated,),
         url_path='download_shopping_cart', url_name='txt_basket',
+        content_negotiation_class=ExportContentNegotiation,
     )
     def download_text_file(self, request):
-        user = request.user
-        if not user.basket.exists():
+        export_format = request.query_params.get('format', 'txt')
+        if export_format not in EXPORT_FORMATS:
             return Response({
-                'errors': 'Список покупок пуст'
+                'errors': 'Неподдерживаемый формат списка покупок'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        basket_components = Component.objects.filter(
-            recipe__basket_recipes__user=user
-        ).values(
-            'product__name',
-            'product__measurement_unit'
-        ).annotate(quantity=Sum('amount')).order_by('product__name')
+        basket_components = shopping_list_rows(request.user).iterator(
+            chunk_size=EXPORT_CHUNK_SIZE
+        )
+        first_component = next(basket_components, None)
+        if first_component is None:
+            return Response({
+                'errors': 'Список покупок пуст'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-        response = HttpResponse(content_type='text/plain')
+        content_type, export = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            export(chain((first_component,), basket_components)),
+            content_type=content_type
+        )
         response['Content-Disposition'] = (
-            'attachment; filename="shopping_list.txt"'
+            f'attachment; filename="shopping_list.{export_format}"'
         )
-        response.write('Список продуктов к покупке\r\n\r\n')
-        for component in basket_components:
-            response.write(
-                f'* {component["product__name"]} - '
-                f'{component["quantity"]} '
-                f'{component["product__measurement_unit"]} \r\n'
-            )
         return response
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(VersionedCacheMixin, ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     http_method_names = ('get',)
     pagination_class = None
+    cache_version = 'tags'
+    replica_reads = True
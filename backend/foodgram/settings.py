@@ -36,6 +36,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.QueryInstrumentationMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -76,6 +78,28 @@ DATABASES = {
     }
 }
 
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+    filter(None, os.getenv('DB_REPLICAS', default='').split(',')), start=1
+):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        DATABASES[alias]['NAME'] = replica
+    else:
+        host, _, port = replica.partition(':')
+        DATABASES[alias].update(HOST=host, PORT=port or DATABASES['default']['PORT'])
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.db.DatabaseCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='django_cache'),
+    }
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -113,12 +137,20 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 AUTH_USER_MODEL = 'users.CustomUser'
 
+JSON_RENDERER = os.getenv(
+    'JSON_RENDERER', default='rest_framework.renderers.JSONRenderer'
+)
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        JSON_RENDERER,
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'],
@@ -142,3 +174,57 @@ DJOSER = {
 
 MIN_TIME = 1
 MIN_COOKING_VALUE = 1
+INGREDIENTS_SEARCH_LIMIT = 50
+REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+REFERENCE_CACHE_MAX_AGE = 60 * 5
+ANONYMOUS_CACHE_TIMEOUT = 60 * 5
+ANONYMOUS_CACHE_LOCK_TIMEOUT = 10
+ANONYMOUS_CACHE_POLL_INTERVAL = 0.05
+SQL_INSTRUMENTATION = os.getenv('SQL_INSTRUMENTATION', default='0') == '1'
+SQL_INSTRUMENTATION_SAMPLE_RATE = float(
+    os.getenv('SQL_INSTRUMENTATION_SAMPLE_RATE', default='0.01')
+)
+SQL_INSTRUMENTATION_DUPLICATES = 3
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.middleware': {'handlers': ['console'], 'level': 'INFO'},
+        'api.routers': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default='0') == '1'
+
+BULK_RECIPES_LIMIT = 100
+FEED_TIMELINE_SIZE = 500
+FEED_PULL_MIN_RECIPES = 1000
+PANTRY_MAX_MISSING = 2
+TOKEN_AUTH_CACHE_SIZE = 1024
+TOKEN_AUTH_LOCAL_TTL = 10
+TOKEN_AUTH_SHARED_TTL = 60
+TOKEN_AUTH_SHARED_CACHE = os.getenv('TOKEN_AUTH_SHARED_CACHE', default='0') == '1'
+TOKEN_AUTH_STATS_INTERVAL = 60
+REPLICA_APPS = ('recipes', 'users')
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', default='10'))
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG', default='5'))
+REPLICA_CHECK_INTERVAL = 5
+RECIPE_FAST_READ = os.getenv('RECIPE_FAST_READ', default='0') == '1'
+SIMILAR_RECIPES_BANDS = 16
+SIMILAR_RECIPES_ROWS = 2
+SIMILAR_RECIPES_LIMIT = 6
+SIMILAR_RECIPES_NEIGHBOURS = 12
+SIMILAR_RECIPES_MIN_SCORE = 0.2
+SIMILAR_RECIPES_TAG_WEIGHT = 0.2
+
+RECIPE_IMAGES_ASYNC = os.getenv('RECIPE_IMAGES_ASYNC', default='1') == '1'
+RECIPE_IMAGE_WORKERS = 2
+RECIPE_IMAGE_VARIANTS = {
+    'list': (480, 320),
+    'detail': (960, 640),
+    'retina': (1920, 1280),
+}
@@ -1,13 +1,17 @@
 from django.contrib import admin
 
+from recipes.feed import fan_out
 from recipes.models import (
     Basket,
     Component,
     FavourRecipe,
     Product,
     Recipe,
+    ShoppingListItem,
     Tag
 )
+from recipes.search import update_search_vectors
+from recipes.similarity import update_similar_recipes
 
 
 @admin.register(Product)
@@ -46,6 +50,13 @@ class RecipeAdmin(admin.ModelAdmin):
     search_fields = ('title', 'author__username', 'author__email',)
     ordering = ('pub_date',)
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        update_search_vectors([form.instance.pk])
+        update_similar_recipes([form.instance.pk])
+        if not change:
+            fan_out(form.instance)
+
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
@@ -76,3 +87,12 @@ class BasketAdmin(admin.ModelAdmin):
     )
     search_fields = ('recipe__title', 'author__username', 'author__email', )
     ordering = ('user', )
+
+
+@admin.register(ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'product', 'amount', 'recipes_count')
+    list_display_links = ('user', )
+    search_fields = ('user__username', 'product__name', )
+    readonly_fields = ('user', 'product', 'amount', 'recipes_count')
+    ordering = ('user', )
@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from recipes.models import FeedEntry, Recipe
+from users.models import CustomUser, Follow
+
+
+def older_than(key, date_field, id_field):
+    if key is None:
+        return Q()
+    pub_date, pk = key
+    return (
+        Q(**{f'{date_field}__lt': pub_date})
+        | Q(**{date_field: pub_date, f'{id_field}__lt': pk})
+    )
+
+
+def pushed_authors(follows):
+    return follows.filter(
+        author__recipes_count__lt=settings.FEED_PULL_MIN_RECIPES
+    ).values('author_id')
+
+
+def pulled_authors(follows):
+    return follows.filter(
+        author__recipes_count__gte=settings.FEED_PULL_MIN_RECIPES
+    ).values('author_id')
+
+
+def trim(user_ids):
+    ranked = FeedEntry.objects.filter(user__in=user_ids).order_by().annotate(
+        position=Window(
+            expression=RowNumber(),
+            partition_by=F('user'),
+            order_by=(F('pub_date').desc(), F('recipe').desc()),
+        )
+    ).values('pk', 'position')
+    sql, params = ranked.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FeedEntry._meta.db_table} WHERE id IN ('
+            f'SELECT ranked.id FROM ({sql}) ranked '
+            f'WHERE ranked.position > %s)',
+            (*params, settings.FEED_TIMELINE_SIZE)
+        )
+
+
+def fan_out(recipe):
+    followers = list(pushed_authors(
+        Follow.objects.filter(author_id=recipe.author_id)
+    ).values_list('user_id', flat=True))
+    if not followers:
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id, recipe_id=recipe.pk,
+                author_id=recipe.author_id, pub_date=recipe.pub_date
+            )
+            for user_id in followers
+        ),
+        batch_size=1000, ignore_conflicts=True
+    )
+    trim(followers)
+
+
+def backfill(user_ids):
+    for user_id in user_ids:
+        FeedEntry.objects.filter(user_id=user_id).delete()
+        recipes = Recipe.objects.filter(
+            author__in=pushed_authors(Follow.objects.filter(user_id=user_id))
+        ).order_by('-pub_date', '-id').values_list(
+            'id', 'author_id', 'pub_date'
+        )[:settings.FEED_TIMELINE_SIZE]
+        FeedEntry.objects.bulk_create(
+            FeedEntry(
+                user_id=user_id, recipe_id=recipe_id,
+                author_id=author_id, pub_date=pub_date
+            )
+            for recipe_id, author_id, pub_date in recipes
+        )
+
+
+def prune(user_id, author_id):
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def backfill_followers(author_id):
+    demoted = CustomUser.objects.filter(
+        pk=author_id, recipes_count=settings.FEED_PULL_MIN_RECIPES - 1
+    ).exists()
+    if demoted:
+        backfill(Follow.objects.filter(author_id=author_id).values_list(
+            'user_id', flat=True
+        ))
+
+
+def feed_keys(user, before, limit):
+    follows = Follow.objects.filter(user=user)
+    timeline = list(
+        FeedEntry.objects.filter(
+            older_than(before, 'pub_date', 'recipe_id'), user=user
+        ).order_by('-pub_date', '-recipe_id').values_list(
+            'pub_date', 'recipe_id'
+        )[:limit]
+    )
+    keys = set(timeline)
+    keys.update(
+        Recipe.objects.filter(
+            older_than(before, 'pub_date', 'id'),
+            author__in=pulled_authors(follows)
+        ).order_by('-pub_date', '-id').values_list('pub_date', 'id')[:limit]
+    )
+    if len(timeline) < limit:
+        horizon = timeline[-1] if timeline else before
+        keys.update(
+            Recipe.objects.filter(
+                older_than(horizon, 'pub_date', 'id'),
+                author__in=follows.values('author_id')
+            ).order_by('-pub_date', '-id').values_list(
+                'pub_date', 'id'
+            )[:limit]
+        )
+    return sorted(keys, reverse=True)[:limit]
@@ -0,0 +1,9 @@
+from django.contrib.postgres.search import SearchVectorField
+
+
+class TSVectorField(SearchVectorField):
+
+    def db_type(self, connection):
+        if connection.vendor == 'postgresql':
+            return 'tsvector'
+        return 'text'
@@ -0,0 +1,101 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+from recipes.models import Recipe
+
+logger = logging.getLogger(__name__)
+
+IMAGE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.RECIPE_IMAGE_WORKERS,
+    thread_name_prefix='recipe-images'
+)
+
+
+def picture_digest(name):
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+def save_picture(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    extension = os.path.splitext(file.name)[1].lower()
+    name = f'images/{digest.hexdigest()}{extension}'
+    if not default_storage.exists(name):
+        file.seek(0)
+        name = default_storage.save(name, file)
+    return name
+
+
+def render_variants(name):
+    directory = f'images/variants/{picture_digest(name)}'
+    variants = {}
+    original = None
+    for variant, size in settings.RECIPE_IMAGE_VARIANTS.items():
+        variants[variant] = {}
+        for image_format, (pillow_format, options) in IMAGE_FORMATS.items():
+            path = (
+                f'{directory}/{variant}-{size[0]}x{size[1]}.{image_format}'
+            )
+            variants[variant][image_format] = path
+            if default_storage.exists(path):
+                continue
+            if original is None:
+                with default_storage.open(name) as file:
+                    original = Image.open(file)
+                    original.load()
+            image = ImageOps.fit(original, size, Image.LANCZOS)
+            if pillow_format == 'JPEG' and image.mode != 'RGB':
+                image = image.convert('RGB')
+            elif image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA')
+            buffer = BytesIO()
+            image.save(buffer, pillow_format, **options)
+            default_storage.save(path, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def process_recipe_picture(recipe_id, name):
+    variants = render_variants(name)
+    with transaction.atomic():
+        recipe = Recipe.objects.select_for_update().filter(
+            pk=recipe_id, picture=name
+        ).first()
+        if recipe is not None:
+            recipe.picture_variants = variants
+            recipe.save(update_fields=('picture_variants',))
+
+
+def process_in_background(recipe_id, name):
+    try:
+        process_recipe_picture(recipe_id, name)
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', name)
+    finally:
+        connection.close()
+
+
+def schedule_picture_processing(recipe):
+    recipe_id, name = recipe.pk, recipe.picture.name
+    if settings.RECIPE_IMAGES_ASYNC:
+        transaction.on_commit(
+            lambda: executor.submit(process_in_background, recipe_id, name)
+        )
+    else:
+        transaction.on_commit(
+            lambda: process_recipe_picture(recipe_id, name)
+        )
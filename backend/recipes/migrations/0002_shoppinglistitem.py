@@ -0,0 +1,51 @@
+# Generated by Django 3.2.8 on 2026-10-18 05:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_shopping_lists(apps, schema_editor):
+    Basket = apps.get_model('recipes', 'Basket')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+    rows = Basket.objects.values(
+        'user_id',
+        product_id=models.F('recipe__recipe_components__product_id'),
+    ).annotate(
+        amount=models.Sum('recipe__recipe_components__amount'),
+        recipes_count=models.Count('id'),
+    ).filter(product_id__isnull=False).order_by()
+    ShoppingListItem.objects.bulk_create(
+        (ShoppingListItem(**row) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingListItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField(default=0, verbose_name='Количество продукта')),
+                ('recipes_count', models.PositiveIntegerField(default=0, verbose_name='Рецептов с продуктом')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list_items', to='recipes.product', verbose_name='Продукт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_list', to=settings.AUTH_USER_MODEL, verbose_name='Владелец списка покупок')),
+            ],
+            options={
+                'verbose_name': 'Продукт в списке покупок',
+                'verbose_name_plural': 'Продукты в списке покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppinglistitem',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='unique_shopping_list_product'),
+        ),
+        migrations.RunPython(fill_shopping_lists, migrations.RunPython.noop),
+    ]
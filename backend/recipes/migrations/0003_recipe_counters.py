@@ -0,0 +1,48 @@
+# Generated by Django 3.2.8 on 2026-10-18 06:00
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        models.Subquery(
+            model.objects.filter(**{field: models.OuterRef('pk')}).order_by()
+            .values(field).annotate(total=models.Count('pk')).values('total')
+        ),
+        0
+    )
+
+
+def fill_counters(apps, schema_editor):
+    Basket = apps.get_model('recipes', 'Basket')
+    FavourRecipe = apps.get_model('recipes', 'FavourRecipe')
+    Recipe = apps.get_model('recipes', 'Recipe')
+    CustomUser = apps.get_model('users', 'CustomUser')
+    Follow = apps.get_model('users', 'Follow')
+    Recipe.objects.update(
+        favorites_count=count_subquery(FavourRecipe, 'recipe')
+    )
+    CustomUser.objects.update(
+        recipes_count=count_subquery(Recipe, 'author'),
+        followers_count=count_subquery(Follow, 'author'),
+        favorites_count=count_subquery(FavourRecipe, 'user'),
+        basket_count=count_subquery(Basket, 'user'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_shoppinglistitem'),
+        ('users', '0002_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Добавлен в избранное раз'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 3.2.8 on 2026-10-18 06:06
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+import recipes.fields
+
+SEARCH_CONFIG = 'russian'
+
+
+def normalize(value):
+    return value.strip().casefold().replace('ё', 'е')
+
+
+def fill_search_vectors(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Component = apps.get_model('recipes', 'Component')
+    recipes = Recipe.objects.filter(search_vector__isnull=True)
+    if schema_editor.connection.vendor == 'postgresql':
+        product_names = Subquery(
+            Component.objects.filter(recipe=OuterRef('pk'))
+            .order_by().values('recipe')
+            .annotate(names=StringAgg('product__name', ' '))
+            .values('names')
+        )
+        recipes.update(search_vector=(
+            SearchVector('title', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+            + SearchVector(product_names, weight='C', config=SEARCH_CONFIG)
+        ))
+        return
+    names = {}
+    for recipe_id, name in Component.objects.values_list(
+        'recipe_id', 'product__name'
+    ):
+        names.setdefault(recipe_id, []).append(name)
+    for recipe_id, title, text in recipes.values_list('pk', 'title', 'text'):
+        document = '\n'.join((title, text, *names.get(recipe_id, ())))
+        Recipe.objects.filter(pk=recipe_id).update(
+            search_vector=normalize(document)
+        )
+
+
+def create_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX recipe_search_vector_gin '
+            'ON recipes_recipe USING gin (search_vector)'
+        )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS recipe_search_vector_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_recipe_picture_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=recipes.fields.TSVectorField(editable=False, null=True, verbose_name='Поисковый индекс'),
+        ),
+        migrations.RunPython(fill_search_vectors, migrations.RunPython.noop),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
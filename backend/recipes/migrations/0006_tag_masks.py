@@ -0,0 +1,46 @@
+# Generated by Django 3.2.8 on 2026-10-18 06:09
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+MAX_TAGS = 63
+
+
+def fill_tag_masks(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Tag = apps.get_model('recipes', 'Tag')
+    tags = list(Tag.objects.order_by('id'))
+    if len(tags) > MAX_TAGS:
+        raise ValueError(f'Нельзя хранить больше {MAX_TAGS} тегов в маске.')
+    for bit, tag in enumerate(tags):
+        tag.bit_mask = 1 << bit
+    Tag.objects.bulk_update(tags, ('bit_mask',))
+    Recipe.objects.update(tag_mask=Coalesce(
+        models.Subquery(
+            Recipe.tags.through.objects.filter(recipe=models.OuterRef('pk'))
+            .order_by().values('recipe')
+            .annotate(mask=models.Sum('tag__bit_mask')).values('mask')
+        ),
+        0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tag_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Маска тегов'),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='bit_mask',
+            field=models.BigIntegerField(editable=False, null=True, unique=True, verbose_name='Битовая маска'),
+        ),
+        migrations.RunPython(fill_tag_masks, migrations.RunPython.noop),
+    ]
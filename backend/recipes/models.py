@@ -1,11 +1,24 @@
-﻿from django.conf import settings
+﻿from collections import Counter, defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
 from django.contrib import admin
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
+from django.db.models import (BooleanField, Count, Exists, F, OuterRef,
+                              Prefetch, Subquery, Sum, Value, Window)
+from django.db.models.functions import Coalesce, RowNumber
 from pytils.translit import slugify
 
+from recipes.fields import TSVectorField
+from users.models import Follow
+
 User = settings.AUTH_USER_MODEL
 
+MAX_TAGS = 63
+
 
 class Product(models.Model):
     name = models.CharField(
@@ -85,6 +98,11 @@ class Tag(models.Model):
         blank=True, null=True,
         verbose_name='Идентификатор'
     )
+    bit_mask = models.BigIntegerField(
+        unique=True,
+        null=True, editable=False,
+        verbose_name='Битовая маска'
+    )
 
     class Meta:
         verbose_name = 'Тег'
@@ -97,9 +115,87 @@ class Tag(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)[:20]
+        if self.bit_mask is None:
+            self.bit_mask = next(free_tag_masks())
         return super().save(*args, **kwargs)
 
 
+def free_tag_masks():
+    used = set(
+        Tag.objects.exclude(bit_mask=None).values_list('bit_mask', flat=True)
+    )
+    for bit in range(MAX_TAGS):
+        if 1 << bit not in used:
+            yield 1 << bit
+    raise ValidationError(f'Нельзя создать больше {MAX_TAGS} тегов.')
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def with_related(self):
+        return self.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_components',
+                queryset=Component.objects.select_related(
+                    'product'
+                ).order_by('pk')
+            ),
+        )
+
+    def with_user_flags(self, user):
+        if user is None or user.is_anonymous:
+            false = Value(False, output_field=BooleanField())
+            return self.annotate(
+                is_favorited=false,
+                is_in_shopping_cart=false,
+                author_is_subscribed=false,
+            )
+        return self.annotate(
+            is_favorited=Exists(FavourRecipe.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(Basket.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            author_is_subscribed=Exists(Follow.objects.filter(
+                user=user, author=OuterRef('author')
+            )),
+        )
+
+    def with_tags(self, masks, match_all=False):
+        mask = reduce(or_, masks, 0)
+        queryset = self.alias(matched_tags=F('tag_mask').bitand(mask))
+        if match_all:
+            return queryset.filter(matched_tags=mask)
+        return queryset.exclude(matched_tags=0)
+
+    def update_tag_masks(self):
+        masks = self.model.tags.through.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            mask=Sum('tag__bit_mask')
+        ).values('mask')
+        return self.update(tag_mask=Coalesce(Subquery(masks), 0))
+
+    def top_per_author(self, author_ids, limit=None):
+        queryset = self.filter(author__in=author_ids)
+        if limit is None:
+            return queryset
+        ranked = queryset.order_by().annotate(row_number=Window(
+            expression=RowNumber(),
+            partition_by=F('author'),
+            order_by=(F('pub_date').desc(), F('id').desc()),
+        ))
+        sql, params = ranked.query.sql_with_params()
+        return self.raw(
+            f'SELECT * FROM ({sql}) ranked '
+            f'WHERE ranked.row_number <= %s '
+            f'ORDER BY ranked.author_id, ranked.row_number',
+            (*params, limit)
+        )
+
+
 class Recipe(models.Model):
     author = models.ForeignKey(
         User,
@@ -115,6 +211,10 @@ class Recipe(models.Model):
         upload_to='images/',
         verbose_name='Картинка блюда'
     )
+    picture_variants = models.JSONField(
+        default=dict, blank=True,
+        verbose_name='Уменьшенные копии картинки'
+    )
     text = models.TextField(
         max_length=3000,
         verbose_name='Описание рецепта'
@@ -131,6 +231,10 @@ class Recipe(models.Model):
         related_name='recipes',
         verbose_name='Теги'
     )
+    tag_mask = models.BigIntegerField(
+        default=0, editable=False,
+        verbose_name='Маска тегов'
+    )
     cooking_time = models.PositiveSmallIntegerField(
         default=1,
         validators=(
@@ -145,6 +249,16 @@ class Recipe(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Добавлен в избранное раз'
+    )
+    search_vector = TSVectorField(
+        null=True, editable=False,
+        verbose_name='Поисковый индекс'
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
@@ -159,7 +273,7 @@ class Recipe(models.Model):
         description='Добавлен в избранное раз',
     )
     def in_favor_count(self):
-        return self.favourite.count()
+        return self.favorites_count
 
 
 class FavourRecipe(models.Model):
@@ -194,7 +308,7 @@ class FavourRecipe(models.Model):
         description='Рецептов в избранном',
     )
     def recipes_count(self):
-        return self.user.favour_recipes.count()
+        return self.user.favorites_count
 
 
 class Basket(models.Model):
@@ -223,4 +337,234 @@ class Basket(models.Model):
         description='Рецептов к покупке',
     )
     def recipes_count(self):
-        return self.user.basket.count()
+        return self.user.basket_count
+
+
+class ShoppingListQuerySet(models.QuerySet):
+
+    def computed(self):
+        return Basket.objects.values(
+            'user_id',
+            product_id=F('recipe__recipe_components__product_id'),
+        ).annotate(
+            amount=Sum('recipe__recipe_components__amount'),
+            recipes_count=Count('id'),
+        ).filter(product_id__isnull=False).order_by()
+
+    def apply_deltas(self, deltas):
+        deltas = {key: delta for key, delta in deltas.items() if any(delta)}
+        if not deltas:
+            return
+        self.bulk_create(
+            [
+                self.model(user_id=user_id, product_id=product_id)
+                for user_id, product_id in deltas
+            ],
+            ignore_conflicts=True,
+        )
+        items = self.select_for_update().filter(
+            user_id__in={user_id for user_id, _ in deltas},
+            product_id__in={product_id for _, product_id in deltas},
+        )
+        changed, emptied = [], []
+        for item in items:
+            delta = deltas.get((item.user_id, item.product_id))
+            if delta is None:
+                continue
+            item.amount = max(item.amount + delta[0], 0)
+            item.recipes_count += delta[1]
+            if item.recipes_count > 0:
+                changed.append(item)
+            else:
+                emptied.append(item.pk)
+        self.bulk_update(changed, ('amount', 'recipes_count'))
+        self.filter(pk__in=emptied).delete()
+
+    def add_recipe(self, user, recipe, times=1):
+        self.add_recipes(user, {recipe.pk: times})
+
+    def add_recipes(self, user, recipes):
+        amounts = defaultdict(Counter)
+        for recipe_id, product_id, amount in Component.objects.filter(
+            recipe__in=recipes
+        ).values_list('recipe_id', 'product_id', 'amount'):
+            amounts[recipe_id][product_id] += amount
+        deltas = defaultdict(lambda: (0, 0))
+        for recipe_id, times in recipes.items():
+            for product_id, amount in amounts[recipe_id].items():
+                total, count = deltas[(user.id, product_id)]
+                deltas[(user.id, product_id)] = (
+                    total + amount * times, count + times
+                )
+        self.apply_deltas(deltas)
+
+    def remove_recipes(self, user, recipes):
+        self.add_recipes(user, {
+            recipe_id: -times for recipe_id, times in recipes.items()
+        })
+
+    def change_components(self, recipe, old_amounts, new_amounts):
+        holders = Counter(
+            Basket.objects.filter(recipe=recipe).values_list(
+                'user_id', flat=True
+            )
+        )
+        deltas = {}
+        for product_id in old_amounts.keys() | new_amounts.keys():
+            old_amount = old_amounts.get(product_id)
+            new_amount = new_amounts.get(product_id)
+            amount_delta = (new_amount or 0) - (old_amount or 0)
+            count_delta = (new_amount is not None) - (old_amount is not None)
+            for user_id, times in holders.items():
+                deltas[(user_id, product_id)] = (
+                    amount_delta * times, count_delta * times
+                )
+        self.apply_deltas(deltas)
+
+
+def recipe_amounts(recipe):
+    amounts = Counter()
+    for product_id, amount in Component.objects.filter(
+        recipe=recipe
+    ).values_list('product_id', 'amount'):
+        amounts[product_id] += amount
+    return amounts
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Владелец списка покупок'
+    )
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE,
+        related_name='shopping_list_items',
+        verbose_name='Продукт'
+    )
+    amount = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество продукта'
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Рецептов с продуктом'
+    )
+
+    objects = ShoppingListQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Продукт в списке покупок'
+        verbose_name_plural = 'Продукты в списке покупок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'product',),
+                name='unique_shopping_list_product',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user}: {self.product} x {self.amount}'
+
+
+class RecipeBand(models.Model):
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='bands',
+        verbose_name='Рецепт'
+    )
+    band = models.PositiveSmallIntegerField(verbose_name='Полоса')
+    bucket = models.BigIntegerField(verbose_name='Корзина')
+
+    class Meta:
+        verbose_name = 'Полоса LSH рецепта'
+        verbose_name_plural = 'Полосы LSH рецептов'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'band',),
+                name='unique_recipe_band',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('band', 'bucket'), name='recipe_band_bucket'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.band} -> {self.bucket}'
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'similar',),
+                name='unique_similar_recipe',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('recipe', '-score'), name='similar_recipe_score'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe_id} ~ {self.similar_id}: {self.score:.2f}'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date', '-recipe')
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'recipe',),
+                name='unique_feed_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_entry_timeline'
+            ),
+            models.Index(
+                fields=('user', 'author'), name='feed_entry_author'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user_id}: {self.recipe_id}'
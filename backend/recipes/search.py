@@ -0,0 +1,62 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVector)
+from django.db import connections
+from django.db.models import F, FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Cast
+
+from recipes.models import Component, Recipe
+
+SEARCH_CONFIG = 'russian'
+
+
+def normalize(value):
+    return value.strip().casefold().replace('ё', 'е')
+
+
+def is_postgresql(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+
+def update_search_vectors(recipe_ids):
+    recipes = Recipe.objects.filter(pk__in=recipe_ids)
+    if is_postgresql(recipes):
+        product_names = Subquery(
+            Component.objects.filter(recipe=OuterRef('pk')).order_by()
+            .values('recipe')
+            .annotate(names=StringAgg('product__name', ' '))
+            .values('names')
+        )
+        recipes.update(search_vector=(
+            SearchVector('title', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('text', weight='B', config=SEARCH_CONFIG)
+            + SearchVector(product_names, weight='C', config=SEARCH_CONFIG)
+        ))
+        return
+    names = {}
+    for recipe_id, name in Component.objects.filter(
+        recipe__in=recipe_ids
+    ).values_list('recipe_id', 'product__name'):
+        names.setdefault(recipe_id, []).append(name)
+    for recipe_id, title, text in recipes.values_list('pk', 'title', 'text'):
+        document = '\n'.join((title, text, *names.get(recipe_id, ())))
+        Recipe.objects.filter(pk=recipe_id).update(
+            search_vector=normalize(document)
+        )
+
+
+def search_recipes(queryset, value):
+    if is_postgresql(queryset):
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=query).annotate(
+            search_rank=Cast(
+                SearchRank(F('search_vector'), query), FloatField()
+            )
+        ).order_by('-search_rank', '-pub_date', '-id')
+    for term in normalize(value).split():
+        queryset = queryset.filter(search_vector__contains=term)
+    return queryset.annotate(
+        search_rank=Value(1.0, output_field=FloatField())
+    ).order_by('-search_rank', '-pub_date', '-id')
@@ -0,0 +1,116 @@
+import hashlib
+import heapq
+import random
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+
+from recipes.models import Component, Recipe, RecipeBand, SimilarRecipe
+
+PRIME = (1 << 31) - 1
+BANDS = settings.SIMILAR_RECIPES_BANDS
+ROWS = settings.SIMILAR_RECIPES_ROWS
+
+_random = random.Random(BANDS * ROWS)
+COEFFICIENTS = np.array([
+    (_random.randrange(1, PRIME), _random.randrange(0, PRIME))
+    for _ in range(BANDS * ROWS)
+], dtype=np.int64)
+
+
+def minhash(product_ids):
+    values = np.fromiter(product_ids, dtype=np.int64)
+    hashes = (COEFFICIENTS[:, :1] * values + COEFFICIENTS[:, 1:]) % PRIME
+    return hashes.min(axis=1)
+
+
+def band_buckets(signature):
+    for band in range(BANDS):
+        digest = hashlib.blake2b(
+            signature[band * ROWS:(band + 1) * ROWS].tobytes(),
+            digest_size=8
+        ).digest()
+        yield band, int.from_bytes(digest, 'big', signed=True)
+
+
+def jaccard(first, second):
+    union = len(first | second)
+    return len(first & second) / union if union else 0.0
+
+
+def load_sets(recipe_ids):
+    products = {recipe_id: set() for recipe_id in recipe_ids}
+    tags = {recipe_id: set() for recipe_id in recipe_ids}
+    for recipe_id, product_id in Component.objects.filter(
+        recipe__in=recipe_ids
+    ).values_list('recipe_id', 'product_id'):
+        products[recipe_id].add(product_id)
+    for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+        recipe__in=recipe_ids
+    ).values_list('recipe_id', 'tag_id'):
+        tags[recipe_id].add(tag_id)
+    return products, tags
+
+
+def update_similar_recipes(recipe_ids):
+    recipe_ids = set(recipe_ids)
+    products, tags = load_sets(recipe_ids)
+    RecipeBand.objects.filter(recipe__in=recipe_ids).delete()
+    SimilarRecipe.objects.filter(
+        Q(recipe__in=recipe_ids) | Q(similar__in=recipe_ids)
+    ).delete()
+    bands = [
+        RecipeBand(recipe_id=recipe_id, band=band, bucket=bucket)
+        for recipe_id, product_ids in products.items() if product_ids
+        for band, bucket in band_buckets(minhash(product_ids))
+    ]
+    RecipeBand.objects.bulk_create(bands)
+
+    band_keys = defaultdict(set)
+    for band in bands:
+        band_keys[band.band].add(band.bucket)
+    buckets = defaultdict(set)
+    for recipe_id, band, bucket in RecipeBand.objects.filter(reduce(or_, (
+        Q(band=band, bucket__in=keys) for band, keys in band_keys.items()
+    ), Q(pk__in=()))).values_list('recipe_id', 'band', 'bucket'):
+        buckets[band, bucket].add(recipe_id)
+    pairs = {
+        tuple(sorted((band.recipe_id, other)))
+        for band in bands
+        for other in buckets[band.band, band.bucket]
+        if other != band.recipe_id
+    }
+    others = {recipe_id for pair in pairs for recipe_id in pair} - recipe_ids
+    other_products, other_tags = load_sets(others)
+    products.update(other_products)
+    tags.update(other_tags)
+
+    weight = settings.SIMILAR_RECIPES_TAG_WEIGHT
+    neighbours = defaultdict(list)
+    for first, second in pairs:
+        score = (
+            (1 - weight) * jaccard(products[first], products[second])
+            + weight * jaccard(tags[first], tags[second])
+        )
+        if score >= settings.SIMILAR_RECIPES_MIN_SCORE:
+            neighbours[first].append((score, second))
+            neighbours[second].append((score, first))
+    stored = SimilarRecipe.objects.filter(
+        recipe__in=set(neighbours) - recipe_ids
+    )
+    for recipe_id, similar_id, score in stored.values_list(
+        'recipe_id', 'similar_id', 'score'
+    ):
+        neighbours[recipe_id].append((score, similar_id))
+    stored.delete()
+    SimilarRecipe.objects.bulk_create(
+        SimilarRecipe(recipe_id=recipe_id, similar_id=similar_id, score=score)
+        for recipe_id, candidates in neighbours.items()
+        for score, similar_id in heapq.nlargest(
+            settings.SIMILAR_RECIPES_NEIGHBOURS, candidates
+        )
+    )
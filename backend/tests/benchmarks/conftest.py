@@ -0,0 +1,109 @@
+import json
+import os
+
+import pytest
+from django.db import transaction
+from rest_framework.test import APIClient
+
+from tests.factories import seed_dataset
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline.json')
+SCALE = {
+    'users': int(os.getenv('BENCH_USERS', 8)),
+    'recipes_per_user': int(os.getenv('BENCH_RECIPES_PER_USER', 5)),
+    'products': int(os.getenv('BENCH_PRODUCTS', 50)),
+    'ingredients_per_recipe': int(os.getenv('BENCH_INGREDIENTS', 6)),
+}
+ROUNDS = int(os.getenv('BENCH_ROUNDS', 5))
+CHECK_LATENCY = os.getenv('BENCH_LATENCY') == '1'
+LATENCY_THRESHOLD = float(os.getenv('BENCH_LATENCY_THRESHOLD', 1.0))
+LATENCY_SLACK_MS = float(os.getenv('BENCH_LATENCY_SLACK_MS', 5))
+UPDATE_BASELINE = os.getenv('BENCH_UPDATE_BASELINE') == '1'
+REPORT_PATH = os.getenv('BENCH_REPORT')
+
+RESULTS = {}
+
+
+def scale_key():
+    return ';'.join(f'{name}={value}' for name, value in sorted(SCALE.items()))
+
+
+@pytest.fixture(scope='session')
+def baseline():
+    if UPDATE_BASELINE or not os.path.exists(BASELINE_PATH):
+        return {}
+    with open(BASELINE_PATH, encoding='utf-8') as file:
+        return json.load(file)
+
+
+@pytest.fixture(scope='module')
+def bench_dataset(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock(), transaction.atomic():
+        dataset = seed_dataset(**SCALE)
+        yield dataset
+        transaction.set_rollback(True)
+
+
+@pytest.fixture
+def bench_context(bench_dataset, db):
+    users = bench_dataset['users']
+    recipes = bench_dataset['recipes']
+    return {
+        'email': users[0].email,
+        'author': users[1].pk,
+        'followed': users[2].pk,
+        'recipe': recipes[0].pk,
+        'foreign_recipe': recipes[1].pk,
+        'recipes': [recipe.pk for recipe in recipes[:10]],
+        'tag': bench_dataset['tags'][0].pk,
+        'product': bench_dataset['products'][0].pk,
+        'products': [
+            product.pk for product in bench_dataset['products'][:4]
+        ],
+    }
+
+
+@pytest.fixture
+def bench_clients(bench_dataset):
+    user = APIClient()
+    user.credentials(
+        HTTP_AUTHORIZATION=f'Token {bench_dataset["tokens"][0].key}'
+    )
+    return {'anonymous': APIClient(), 'user': user}
+
+
+def pytest_sessionfinish(session):
+    if not RESULTS:
+        return
+    report = {'scale': scale_key(), 'rounds': ROUNDS, 'endpoints': RESULTS}
+    if REPORT_PATH:
+        with open(REPORT_PATH, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if UPDATE_BASELINE:
+        with open(BASELINE_PATH, 'w', encoding='utf-8') as file:
+            json.dump(
+                {'scale': scale_key(), 'endpoints': {
+                    key: {
+                        'queries': result['queries'],
+                        'p50_ms': result['p50_ms'],
+                    }
+                    for key, result in sorted(RESULTS.items())
+                }},
+                file, ensure_ascii=False, indent=2, sort_keys=True
+            )
+            file.write('\n')
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not RESULTS:
+        return
+    terminalreporter.section('endpoint benchmarks')
+    terminalreporter.write_line(
+        f'{"endpoint":<40} {"queries":>7} {"p50 ms":>8} '
+        f'{"p95 ms":>8} {"max ms":>8}'
+    )
+    for key, result in sorted(RESULTS.items()):
+        terminalreporter.write_line(
+            f'{key:<40} {result["queries"]:>7} {result["p50_ms"]:>8.2f} '
+            f'{result["p95_ms"]:>8.2f} {result["max_ms"]:>8.2f}'
+        )
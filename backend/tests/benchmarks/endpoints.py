@@ -0,0 +1,136 @@
+from collections import namedtuple
+
+from tests.factories import PIXEL_DATA_URI
+
+Endpoint = namedtuple(
+    'Endpoint', ('name', 'method', 'path', 'data', 'anonymous', 'user')
+)
+
+
+def new_user(context):
+    return {
+        'email': 'benchmark@example.com', 'username': 'benchmark',
+        'first_name': 'Бенч', 'last_name': 'Марк', 'password': 'Pa55-word!',
+    }
+
+
+def new_recipe(context):
+    return {
+        'name': 'Новый рецепт', 'text': 'Описание', 'cooking_time': 15,
+        'image': PIXEL_DATA_URI, 'tags': [context['tag']],
+        'ingredients': [
+            {'id': product, 'amount': 10} for product in context['products']
+        ],
+    }
+
+
+def recipe_changes(context):
+    return {
+        'name': 'Изменённый рецепт', 'tags': [context['tag']],
+        'ingredients': [
+            {'id': product, 'amount': 20} for product in context['products']
+        ],
+    }
+
+
+def new_image(context):
+    return {'image': PIXEL_DATA_URI}
+
+
+def recipe_ids(context):
+    return {'ids': context['recipes']}
+
+
+def credentials(context):
+    return {'email': context['email'], 'password': 'password'}
+
+
+def password_change(context):
+    return {'current_password': 'password', 'new_password': 'Pa55-word!'}
+
+
+def pantry_query(context):
+    return {'products': ','.join(map(str, context['products']))}
+
+
+ENDPOINTS = (
+    Endpoint('api-root', 'get', '/api/', None, (200, 0), (200, 1)),
+    Endpoint('users-list', 'get', '/api/users/', None,
+             (200, 3), (200, 5)),
+    Endpoint('users-create', 'post', '/api/users/', new_user,
+             (201, 3), None),
+    Endpoint('users-detail', 'get', '/api/users/{author}/', None,
+             (401, 0), (200, 4)),
+    Endpoint('users-me', 'get', '/api/users/me/', None,
+             (401, 0), (200, 3)),
+    Endpoint('users-set-password', 'post', '/api/users/set_password/',
+             password_change, (401, 0), (204, 3)),
+    Endpoint('users-subscriptions', 'get', '/api/users/subscriptions/',
+             None, (401, 0), (200, 4)),
+    Endpoint('users-subscribe', 'post', '/api/users/{author}/subscribe/',
+             None, (401, 0), (201, 13)),
+    Endpoint('users-unsubscribe', 'delete',
+             '/api/users/{followed}/subscribe/', None, (401, 0), (204, 8)),
+    Endpoint('token-login', 'post', '/api/auth/token/login/', credentials,
+             (200, 3), None),
+    Endpoint('token-logout', 'post', '/api/auth/token/logout/', None,
+             (401, 0), (204, 3)),
+    Endpoint('tags-list', 'get', '/api/tags/', None, (200, 1), (200, 1)),
+    Endpoint('tags-detail', 'get', '/api/tags/{tag}/', None,
+             (200, 1), (200, 1)),
+    Endpoint('ingredients-list', 'get', '/api/ingredients/', None,
+             (200, 1), (200, 1)),
+    Endpoint('ingredients-search', 'get', '/api/ingredients/?name=прод',
+             None, (200, 1), (200, 1)),
+    Endpoint('ingredients-detail', 'get', '/api/ingredients/{product}/',
+             None, (200, 1), (200, 1)),
+    Endpoint('recipes-list', 'get', '/api/recipes/', None,
+             (200, 4), (200, 5)),
+    Endpoint('recipes-list-tags', 'get',
+             '/api/recipes/?tags=breakfast&tags=dinner', None,
+             (200, 5), (200, 6)),
+    Endpoint('recipes-list-favorited', 'get',
+             '/api/recipes/?is_favorited=1', None, (200, 4), (200, 5)),
+    Endpoint('recipes-list-cursor', 'get', '/api/recipes/?cursor=', None,
+             (200, 3), (200, 4)),
+    Endpoint('recipes-search', 'get', '/api/recipes/?search=рецепт', None,
+             (200, 4), (200, 5)),
+    Endpoint('recipes-detail', 'get', '/api/recipes/{recipe}/', None,
+             (200, 3), (200, 4)),
+    Endpoint('recipes-create', 'post', '/api/recipes/', new_recipe,
+             (401, 0), (201, 34)),
+    Endpoint('recipes-update', 'patch', '/api/recipes/{recipe}/',
+             recipe_changes, (401, 0), (200, 34)),
+    Endpoint('recipes-delete', 'delete', '/api/recipes/{recipe}/', None,
+             (401, 0), (204, 25)),
+    Endpoint('recipes-image', 'put', '/api/recipes/{recipe}/image/',
+             new_image, (401, 0), (200, 9)),
+    Endpoint('recipes-similar', 'get', '/api/recipes/{recipe}/similar/',
+             None, (200, 2), (200, 3)),
+    Endpoint('recipes-feed', 'get', '/api/recipes/feed/', None,
+             (401, 0), (200, 6)),
+    Endpoint('recipes-pantry', 'get', '/api/recipes/pantry/', pantry_query,
+             (200, 4), (200, 4)),
+    Endpoint('recipes-favorite', 'post',
+             '/api/recipes/{foreign_recipe}/favorite/', None,
+             (401, 0), (201, 7)),
+    Endpoint('recipes-unfavorite', 'delete',
+             '/api/recipes/{recipe}/favorite/', None, (401, 0), (204, 6)),
+    Endpoint('recipes-add-to-cart', 'post',
+             '/api/recipes/{foreign_recipe}/shopping_cart/', None,
+             (401, 0), (201, 10)),
+    Endpoint('recipes-remove-from-cart', 'delete',
+             '/api/recipes/{recipe}/shopping_cart/', None,
+             (401, 0), (204, 10)),
+    Endpoint('recipes-bulk-favorite', 'post', '/api/recipes/favorite/',
+             recipe_ids, (401, 0), (200, 8)),
+    Endpoint('recipes-bulk-unfavorite', 'delete', '/api/recipes/favorite/',
+             recipe_ids, (401, 0), (200, 8)),
+    Endpoint('recipes-bulk-add-to-cart', 'post',
+             '/api/recipes/shopping_cart/', recipe_ids, (401, 0), (200, 11)),
+    Endpoint('recipes-bulk-remove-from-cart', 'delete',
+             '/api/recipes/shopping_cart/', recipe_ids, (401, 0), (200, 12)),
+    Endpoint('recipes-download-cart', 'get',
+             '/api/recipes/download_shopping_cart/', None,
+             (401, 0), (200, 2)),
+)
@@ -0,0 +1,82 @@
+import statistics
+import time
+
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.authentication import token_cache
+from tests.benchmarks.conftest import (CHECK_LATENCY, LATENCY_SLACK_MS,
+                                       LATENCY_THRESHOLD, RESULTS, ROUNDS,
+                                       scale_key)
+from tests.benchmarks.endpoints import ENDPOINTS
+
+CASES = [
+    pytest.param(endpoint, role, id=f'{endpoint.name}:{role}')
+    for endpoint in ENDPOINTS
+    for role in ('anonymous', 'user')
+    if getattr(endpoint, role) is not None
+]
+
+
+def request_once(client, endpoint, context):
+    path = endpoint.path.format(**context)
+    data = endpoint.data(context) if endpoint.data else None
+    cache.clear()
+    token_cache.clear()
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(client, endpoint.method)(
+                path, data, format=None if endpoint.method == 'get' else 'json'
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = (time.perf_counter() - started) * 1000
+        transaction.set_rollback(True)
+    return response, len(queries), elapsed
+
+
+def percentile(timings, share):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(('endpoint', 'role'), CASES)
+def test_endpoint(endpoint, role, bench_context, bench_clients, baseline):
+    status, budget = getattr(endpoint, role)
+    queries = 0
+    timings = []
+    for _ in range(ROUNDS):
+        response, count, elapsed = request_once(
+            bench_clients[role], endpoint, bench_context
+        )
+        assert response.status_code == status, response.content[:500]
+        queries = max(queries, count)
+        timings.append(elapsed)
+
+    key = f'{endpoint.name}:{role}'
+    result = RESULTS[key] = {
+        'queries': queries,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'max_ms': round(max(timings), 3),
+        'timings_ms': [round(timing, 3) for timing in timings],
+    }
+    assert queries <= budget, (
+        f'{key}: {queries} запросов к БД при бюджете {budget}'
+    )
+    reference = baseline.get('endpoints', {}).get(key)
+    if reference is None:
+        return
+    assert queries <= reference['queries'], (
+        f'{key}: {queries} запросов к БД, в эталоне {reference["queries"]}'
+    )
+    if CHECK_LATENCY and baseline.get('scale') == scale_key():
+        limit = reference['p50_ms'] * (1 + LATENCY_THRESHOLD)
+        assert result['p50_ms'] <= limit + LATENCY_SLACK_MS, (
+            f'{key}: медиана {result["p50_ms"]} мс, '
+            f'в эталоне {reference["p50_ms"]} мс'
+        )
@@ -0,0 +1,34 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+from tests.factories import seed_dataset
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    token_cache.clear()
+    yield
+    cache.clear()
+    token_cache.clear()
+
+
+@pytest.fixture
+def dataset(db):
+    return seed_dataset()
+
+
+@pytest.fixture
+def anonymous_client():
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(dataset):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {dataset["tokens"][0].key}'
+    )
+    return client
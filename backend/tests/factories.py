@@ -0,0 +1,84 @@
+import base64
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (Basket, Component, FavourRecipe, Product, Recipe,
+                            ShoppingListItem, Tag)
+from users.models import CustomUser, Follow
+
+PIXEL = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9Q'
+    'DwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+PIXEL_DATA_URI = (
+    f'data:image/png;base64,{base64.b64encode(PIXEL).decode()}'
+)
+
+
+def seed_dataset(users=4, recipes_per_user=3, products=12,
+                 ingredients_per_recipe=4):
+    authors = [
+        CustomUser.objects.create_user(
+            email=f'user{index}@example.com', username=f'user{index}',
+            password='password', first_name=f'Имя{index}',
+            last_name=f'Фамилия{index}'
+        )
+        for index in range(users)
+    ]
+    tags = [
+        Tag.objects.create(name=name, color=color, slug=slug)
+        for name, color, slug in (
+            ('Завтрак', '#e26c2d', 'breakfast'),
+            ('Обед', '#49b64e', 'lunch'),
+            ('Ужин', '#8775d2', 'dinner'),
+        )
+    ]
+    Product.objects.bulk_create(
+        Product(name=f'Продукт {index}', measurement_unit='г')
+        for index in range(products)
+    )
+    catalogue = list(Product.objects.order_by('pk'))
+    picture = Recipe._meta.get_field('picture').storage.save(
+        'images/pixel.png', ContentFile(PIXEL)
+    )
+    recipes = []
+    for index in range(users * recipes_per_user):
+        recipe = Recipe.objects.create(
+            author=authors[index % users], title=f'Рецепт {index}',
+            text=f'Описание рецепта {index}', cooking_time=index + 1,
+            picture=picture,
+            picture_variants=(
+                {'list': {'webp': f'images/variants/{index}/list.webp'}}
+                if index % 2 else {}
+            ),
+        )
+        recipe.tags.set(tags[:1 + index % len(tags)])
+        Component.objects.bulk_create(
+            Component(
+                recipe=recipe, amount=index + position + 1,
+                product=catalogue[(index + position) % len(catalogue)]
+            )
+            for position in range(ingredients_per_recipe)
+        )
+        recipes.append(recipe)
+    for position, user in enumerate(authors):
+        for author in authors[position + 2:] + authors[:position]:
+            Follow.objects.create(user=user, author=author)
+        for recipe in recipes[::2]:
+            FavourRecipe.objects.create(user=user, recipe=recipe)
+        for recipe in recipes[::3]:
+            Basket.objects.create(user=user, recipe=recipe)
+            ShoppingListItem.objects.add_recipe(user, recipe)
+    for command in ('recount_counters', 'rebuild_search_vectors',
+                    'rebuild_similar_recipes', 'rebuild_feeds'):
+        call_command(command, stdout=StringIO())
+    return {
+        'users': authors,
+        'tokens': [Token.objects.create(user=user) for user in authors],
+        'tags': tags,
+        'products': catalogue,
+        'recipes': recipes,
+    }
@@ -0,0 +1,29 @@
+import os
+import tempfile
+
+os.environ.setdefault('SECRET_KEY', 'tests')
+
+from foodgram.settings import *  # noqa: E402,F401,F403
+
+if not os.getenv('DB_ENGINE'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+    }
+
+DATABASES['replica_1'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+DATABASE_REPLICAS = []
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='foodgram-tests-')
+RECIPE_IMAGES_ASYNC = False
+
+PASSWORD_HASHERS = ('django.contrib.auth.hashers.MD5PasswordHasher',)
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.mark.parametrize('first, second', (
+    ({'HTTP_HOST': 'one.example'}, {'HTTP_HOST': 'two.example'}),
+    ({'HTTP_HOST': 'one.example'}, {'HTTP_HOST': 'one.example',
+                                    'secure': True}),
+))
+def test_cache_key_includes_origin(dataset, anonymous_client, first,
+                                   second):
+    for extra in (first, second, first):
+        scheme = 'https' if extra.get('secure') else 'http'
+        response = anonymous_client.get('/api/recipes/', **extra)
+        assert response.status_code == 200
+        image = response.json()['results'][0]['image']
+        assert image.startswith(f'{scheme}://{extra["HTTP_HOST"]}/')
+
+
+def test_repeated_reads_are_cached(dataset, anonymous_client,
+                                   django_assert_num_queries):
+    first = anonymous_client.get('/api/recipes/')
+    with django_assert_num_queries(0):
+        second = anonymous_client.get('/api/recipes/')
+    assert second.content == first.content
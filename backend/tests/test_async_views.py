@@ -0,0 +1,154 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+
+from api import async_views
+from recipes.models import Recipe
+from tests.factories import PIXEL_DATA_URI, seed_dataset
+
+SHOPPING_CART_QUERIES = ('', '?format=csv', '?format=json', '?format=pdf')
+SUBSCRIPTION_QUERIES = (
+    '',
+    '?page=2&limit=1',
+    '?recipes_limit=1',
+    '?page=9',
+    '?page=last&limit=2',
+    '?cursor=&limit=2',
+)
+
+
+@pytest.fixture
+def async_dataset(transactional_db):
+    return seed_dataset()
+
+
+def headers(dataset, index=0):
+    return {'HTTP_AUTHORIZATION': f'Token {dataset["tokens"][index].key}'}
+
+
+def call_async(view, path, method='get', data=None, view_kwargs=None,
+               **kwargs):
+    factory = RequestFactory()
+    if method == 'put':
+        request = factory.put(
+            path, data, content_type='application/json', **kwargs
+        )
+    else:
+        request = factory.get(path, **kwargs)
+    return async_to_sync(view)(request, **(view_kwargs or {}))
+
+
+def content(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def assert_same(sync, asynchronous):
+    assert asynchronous.status_code == sync.status_code
+    assert content(asynchronous) == content(sync)
+    for header in ('Content-Type', 'Content-Disposition'):
+        assert asynchronous.get(header) == sync.get(header)
+
+
+@pytest.mark.parametrize('query', SHOPPING_CART_QUERIES)
+def test_shopping_cart_matches_sync(async_dataset, client, query):
+    path = f'/api/recipes/download_shopping_cart/{query}'
+    assert_same(
+        client.get(path, **headers(async_dataset)),
+        call_async(async_views.download_shopping_cart, path,
+                   **headers(async_dataset))
+    )
+
+
+def test_shopping_cart_is_streamed(async_dataset):
+    response = call_async(
+        async_views.download_shopping_cart,
+        '/api/recipes/download_shopping_cart/', **headers(async_dataset)
+    )
+    assert response.status_code == 200
+    assert response.streaming
+
+
+def test_database_connection_is_reused(async_dataset):
+    connection.ensure_connection()
+    opened = []
+
+    def on_connect(sender, **kwargs):
+        opened.append(kwargs['connection'])
+
+    connection_created.connect(on_connect)
+    try:
+        for view in (async_views.subscriptions,
+                     async_views.download_shopping_cart):
+            response = call_async(
+                view, '/api/users/subscriptions/', **headers(async_dataset)
+            )
+            assert response.status_code == 200
+    finally:
+        connection_created.disconnect(on_connect)
+    assert opened == []
+
+
+def test_empty_shopping_cart_matches_sync(async_dataset, client):
+    path = '/api/recipes/download_shopping_cart/'
+    assert_same(
+        client.get(path, **headers(async_dataset, 1)),
+        call_async(async_views.download_shopping_cart, path,
+                   **headers(async_dataset, 1))
+    )
+
+
+@pytest.mark.parametrize('query', SUBSCRIPTION_QUERIES)
+def test_subscriptions_match_sync(async_dataset, client, query):
+    path = f'/api/users/subscriptions/{query}'
+    assert_same(
+        client.get(path, **headers(async_dataset)),
+        call_async(async_views.subscriptions, path, **headers(async_dataset))
+    )
+
+
+@pytest.mark.parametrize('view', (
+    async_views.download_shopping_cart, async_views.subscriptions
+))
+def test_anonymous_requests_rejected(async_dataset, view):
+    response = call_async(view, '/api/users/subscriptions/')
+    assert response.status_code == 401
+    assert response['WWW-Authenticate'] == 'Token'
+
+
+def test_recipe_image_matches_sync(async_dataset, client):
+    recipe = Recipe.objects.filter(author=async_dataset['users'][0]).first()
+    path = f'/api/recipes/{recipe.pk}/image/'
+    data = {'image': PIXEL_DATA_URI}
+    sync = client.put(path, data, content_type='application/json',
+                      **headers(async_dataset))
+    asynchronous = call_async(
+        async_views.recipe_image, path, 'put', data,
+        view_kwargs={'pk': recipe.pk}, **headers(async_dataset)
+    )
+    assert_same(sync, asynchronous)
+    assert sync.json()['id'] == recipe.pk
+
+
+@pytest.mark.parametrize('index, pk_offset, data, status_code', (
+    (None, 0, {'image': PIXEL_DATA_URI}, 401),
+    (1, 0, {'image': PIXEL_DATA_URI}, 403),
+    (0, 10 ** 6, {'image': PIXEL_DATA_URI}, 404),
+    (0, 0, {'image': 'not an image'}, 400),
+))
+def test_recipe_image_errors_match_sync(async_dataset, client, index,
+                                        pk_offset, data, status_code):
+    recipe = Recipe.objects.filter(author=async_dataset['users'][0]).first()
+    pk = recipe.pk + pk_offset
+    path = f'/api/recipes/{pk}/image/'
+    auth = {} if index is None else headers(async_dataset, index)
+    sync = client.put(path, data, content_type='application/json', **auth)
+    asynchronous = call_async(
+        async_views.recipe_image, path, 'put', data,
+        view_kwargs={'pk': pk}, **auth
+    )
+    assert sync.status_code == status_code
+    assert_same(sync, asynchronous)
@@ -0,0 +1,136 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Basket, FavourRecipe, Recipe, ShoppingListItem
+from users.models import CustomUser
+
+MISSING = 10 ** 6
+
+
+def shopping_list(user):
+    return {
+        (item['product_id'], item['amount'], item['recipes_count'])
+        for item in ShoppingListItem.objects.filter(user=user).values(
+            'product_id', 'amount', 'recipes_count'
+        )
+    }
+
+
+def computed_shopping_list(user):
+    return {
+        (item['product_id'], item['amount'], item['recipes_count'])
+        for item in ShoppingListItem.objects.computed().filter(user_id=user.pk)
+    }
+
+
+def statuses(response):
+    return {item['id']: item['status'] for item in response.json()['results']}
+
+
+def test_bulk_favorite_add_and_remove(dataset, user_client):
+    user = dataset['users'][0]
+    favorite, plain = dataset['recipes'][0], dataset['recipes'][1]
+    ids = [favorite.pk, plain.pk, plain.pk, MISSING]
+    response = user_client.post('/api/recipes/favorite/', {'ids': ids},
+                                format='json')
+    assert response.status_code == 200
+    assert statuses(response) == {
+        favorite.pk: 'exists', plain.pk: 'added', MISSING: 'not_found'
+    }
+    assert len(response.json()['results']) == 3
+    assert FavourRecipe.objects.filter(user=user, recipe=plain).exists()
+    plain.refresh_from_db()
+    assert plain.favorites_count == FavourRecipe.objects.filter(
+        recipe=plain
+    ).count()
+
+    response = user_client.delete('/api/recipes/favorite/',
+                                  {'ids': [favorite.pk, MISSING]},
+                                  format='json')
+    assert statuses(response) == {favorite.pk: 'removed', MISSING: 'not_found'}
+    response = user_client.delete('/api/recipes/favorite/',
+                                  {'ids': [favorite.pk]}, format='json')
+    assert statuses(response) == {favorite.pk: 'absent'}
+    user.refresh_from_db()
+    assert user.favorites_count == FavourRecipe.objects.filter(
+        user=user
+    ).count()
+
+
+def test_bulk_shopping_cart_keeps_shopping_list_consistent(dataset,
+                                                           user_client):
+    user = dataset['users'][0]
+    ids = [recipe.pk for recipe in dataset['recipes'][:5]]
+    in_cart = set(Basket.objects.filter(user=user).values_list(
+        'recipe_id', flat=True
+    ))
+    assert in_cart & set(ids)
+    response = user_client.post('/api/recipes/shopping_cart/', {'ids': ids},
+                                format='json')
+    assert statuses(response) == {
+        pk: 'exists' if pk in in_cart else 'added' for pk in ids
+    }
+    assert shopping_list(user) == computed_shopping_list(user)
+
+    basket = Basket.objects.filter(user=user).count()
+    response = user_client.post('/api/recipes/shopping_cart/', {'ids': ids},
+                                format='json')
+    assert set(statuses(response).values()) == {'exists'}
+    assert Basket.objects.filter(user=user).count() == basket
+    assert shopping_list(user) == computed_shopping_list(user)
+
+    response = user_client.delete('/api/recipes/shopping_cart/',
+                                  {'ids': ids[:3]}, format='json')
+    assert set(statuses(response).values()) == {'removed'}
+    assert not Basket.objects.filter(user=user, recipe__in=ids[:3]).exists()
+    assert shopping_list(user) == computed_shopping_list(user)
+    user.refresh_from_db()
+    assert user.basket_count == Basket.objects.filter(user=user).count()
+
+
+def test_bulk_query_count_does_not_grow_with_ids(dataset, user_client):
+    counts = []
+    for recipes in (dataset['recipes'][1:3], dataset['recipes'][3:11]):
+        with CaptureQueriesContext(connection) as context:
+            user_client.post('/api/recipes/shopping_cart/',
+                             {'ids': [recipe.pk for recipe in recipes]},
+                             format='json')
+        counts.append(len(context.captured_queries))
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.parametrize('data', (
+    {}, {'ids': []}, {'ids': ['x']}, {'ids': [0]},
+    {'ids': list(range(1, 102))},
+))
+def test_bulk_rejects_invalid_ids(dataset, user_client, data):
+    response = user_client.post('/api/recipes/favorite/', data,
+                                format='json')
+    assert response.status_code == 400
+
+
+def test_bulk_requires_authentication(dataset, anonymous_client):
+    response = anonymous_client.post(
+        '/api/recipes/favorite/', {'ids': [1]}, format='json'
+    )
+    assert response.status_code == 401
+
+
+def test_bulk_rolls_back_on_error(dataset, user_client, monkeypatch):
+    user = dataset['users'][0]
+    before = shopping_list(user)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError
+
+    monkeypatch.setattr(ShoppingListItem.objects, 'add_recipes', fail)
+    user_client.raise_request_exception = False
+    ids = [recipe.pk for recipe in Recipe.objects.all()[:4]]
+    response = user_client.post('/api/recipes/shopping_cart/', {'ids': ids},
+                                format='json')
+    assert response.status_code == 500
+    assert shopping_list(user) == before
+    assert CustomUser.objects.get(pk=user.pk).basket_count == (
+        Basket.objects.filter(user=user).count()
+    )
@@ -0,0 +1,119 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.caching import get_version
+from recipes.models import Product, Tag
+
+
+def write(path, name, content):
+    file = path / name
+    file.write_text(content, encoding='utf-8')
+    return str(file)
+
+
+def load(command, filename, *args):
+    output = StringIO()
+    call_command(command, filename, *args, stdout=output)
+    return output.getvalue()
+
+
+def products_csv(count):
+    return ''.join(f'Продукт {index},г\n' for index in range(count))
+
+
+def test_ingredients_load_is_idempotent(db, tmp_path):
+    filename = write(
+        tmp_path, 'ingredients.csv',
+        'соль,г\nсахар,г\nсоль,г\nсоль,щепотка\n'
+    )
+    version = get_version('products')
+    assert 'добавлено 3, пропущено 1' in load('load_ingredients', filename)
+    assert set(Product.objects.values_list('name', 'measurement_unit')) == {
+        ('соль', 'г'), ('сахар', 'г'), ('соль', 'щепотка')
+    }
+    assert get_version('products') != version
+    version = get_version('products')
+    assert 'добавлено 0, пропущено 4' in load('load_ingredients', filename)
+    assert Product.objects.count() == 3
+    assert get_version('products') == version
+
+
+def test_query_count_does_not_grow_with_rows(db, tmp_path):
+    counts = []
+    for count in (10, 200):
+        Product.objects.all().delete()
+        filename = write(tmp_path, f'{count}.csv', products_csv(count))
+        with CaptureQueriesContext(connection) as queries:
+            load('load_ingredients', filename)
+        counts.append(len(queries))
+        assert Product.objects.count() == count
+    assert counts[0] == counts[1]
+
+
+def test_batches(db, tmp_path):
+    filename = write(tmp_path, 'ingredients.csv', products_csv(25))
+    load('load_ingredients', filename, '--batch-size', '10')
+    assert Product.objects.count() == 25
+
+
+def test_dry_run_writes_nothing(db, tmp_path):
+    filename = write(tmp_path, 'ingredients.csv', products_csv(5))
+    output = load('load_ingredients', filename, '--dry-run')
+    assert 'Пробный запуск' in output
+    assert 'добавлено 5' in output
+    assert not Product.objects.exists()
+
+
+def test_invalid_row_rolls_back(db, tmp_path):
+    filename = write(tmp_path, 'ingredients.csv', 'соль,г\nсахар\n')
+    with pytest.raises(CommandError, match='Строка 2'):
+        load('load_ingredients', filename, '--batch-size', '1')
+    assert not Product.objects.exists()
+
+
+@pytest.mark.parametrize('content, message', (
+    (None, 'не найден'),
+    ('[{', 'Некорректный JSON'),
+))
+def test_file_errors(db, tmp_path, content, message):
+    filename = str(tmp_path / 'ingredients.json')
+    if content is not None:
+        write(tmp_path, 'ingredients.json', content)
+    with pytest.raises(CommandError, match=message):
+        load('load_ingredients', filename)
+
+
+def test_fixture_json_loads_only_its_model(db, tmp_path):
+    filename = write(tmp_path, 'fixtures.json', json.dumps([
+        {'model': 'recipes.product', 'pk': 1,
+         'fields': {'name': 'мука', 'measurement_unit': 'г'}},
+        {'model': 'recipes.tag', 'pk': 1,
+         'fields': {'name': 'Ужин', 'color': '#000000', 'slug': 'dinner'}},
+        {'name': 'масло', 'measurement_unit': 'мл'},
+    ]))
+    load('load_ingredients', filename)
+    assert set(Product.objects.values_list('name', flat=True)) == {
+        'мука', 'масло'
+    }
+    load('load_tags', filename)
+    assert list(Tag.objects.values_list('slug', flat=True)) == ['dinner']
+
+
+def test_tags_get_slugs_and_distinct_masks(db, tmp_path):
+    filename = write(
+        tmp_path, 'tags.csv',
+        'Завтрак,#e26c2d,\nОбед,#49b64e,lunch\nУжин,#8775d2,\n'
+        'Обед,#ffffff,other\n'
+    )
+    assert 'добавлено 3, пропущено 1' in load('load_tags', filename)
+    tags = {tag.name: tag for tag in Tag.objects.all()}
+    assert tags['Обед'].slug == 'lunch'
+    assert tags['Завтрак'].slug and tags['Ужин'].slug
+    masks = [tag.bit_mask for tag in tags.values()]
+    assert len(set(masks)) == 3
+    assert all(mask and mask & (mask - 1) == 0 for mask in masks)
@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from api.counters import RECIPE_COUNTERS, USER_COUNTERS, bump
+from recipes.models import FavourRecipe, Recipe
+from tests.factories import PIXEL_DATA_URI
+from users.models import CustomUser, Follow
+
+
+def actual(model, counters):
+    return {
+        obj['pk']: {name: obj[name] for name in counters}
+        for obj in model.objects.values('pk', *counters)
+    }
+
+
+def expected(model, counters):
+    return {
+        pk: {
+            name: related.objects.filter(**{field: pk}).count()
+            for name, (related, field) in counters.items()
+        }
+        for pk in model.objects.values_list('pk', flat=True)
+    }
+
+
+def assert_counters_match():
+    assert actual(CustomUser, USER_COUNTERS) == expected(
+        CustomUser, USER_COUNTERS
+    )
+    assert actual(Recipe, RECIPE_COUNTERS) == expected(
+        Recipe, RECIPE_COUNTERS
+    )
+
+
+def test_seeded_counters_match(dataset):
+    assert_counters_match()
+
+
+def test_counters_follow_api_writes(dataset, user_client):
+    users, recipes = dataset['users'], dataset['recipes']
+    user_client.post(f'/api/recipes/{recipes[1].pk}/favorite/')
+    user_client.delete(f'/api/recipes/{recipes[0].pk}/favorite/')
+    user_client.post(f'/api/recipes/{recipes[1].pk}/shopping_cart/')
+    user_client.delete(f'/api/recipes/{recipes[0].pk}/shopping_cart/')
+    user_client.post(f'/api/users/{users[1].pk}/subscribe/')
+    user_client.delete(f'/api/users/{users[2].pk}/subscribe/')
+    response = user_client.post('/api/recipes/', {
+        'name': 'Новый рецепт', 'text': 'Описание', 'cooking_time': 5,
+        'image': PIXEL_DATA_URI, 'tags': [dataset['tags'][0].pk],
+        'ingredients': [{'id': dataset['products'][0].pk, 'amount': 1}],
+    }, format='json')
+    assert response.status_code == 201
+    user_client.delete(f'/api/recipes/{recipes[4].pk}/')
+    assert_counters_match()
+
+
+def test_counters_are_served(dataset, user_client):
+    author = dataset['users'][2]
+    recipe = dataset['recipes'][0]
+    data = user_client.get(f'/api/users/{author.pk}/').json()
+    assert data['followers_count'] == Follow.objects.filter(
+        author=author
+    ).count()
+    data = user_client.get(f'/api/recipes/{recipe.pk}/').json()
+    assert data['favorites_count'] == FavourRecipe.objects.filter(
+        recipe=recipe
+    ).count()
+
+
+def test_bump_never_goes_negative(dataset):
+    user = dataset['users'][0]
+    bump(CustomUser.objects.filter(pk=user.pk), favorites_count=-1000)
+    user.refresh_from_db()
+    assert user.favorites_count == 0
+
+
+def test_recount_repairs_drift(dataset):
+    CustomUser.objects.update(recipes_count=99, followers_count=0)
+    Recipe.objects.update(favorites_count=42)
+    call_command('recount_counters', batch_size=2, stdout=StringIO())
+    assert_counters_match()
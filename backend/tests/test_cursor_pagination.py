@@ -0,0 +1,78 @@
+import base64
+import json
+
+import pytest
+from django.db.models import F
+from rest_framework.request import Request
+
+from api.paginations import PageLimitNumberPagination
+from recipes.models import Recipe
+from users.models import Follow
+
+
+def encode(values):
+    payload = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def walk(client, url):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        ids.extend(item['id'] for item in data['results'])
+        url = data['next']
+    return ids
+
+
+@pytest.mark.parametrize('limit', (1, 4, 50))
+def test_recipe_cursor_pages_cover_list(dataset, user_client, limit):
+    assert walk(user_client, f'/api/recipes/?cursor=&limit={limit}') == list(
+        Recipe.objects.order_by('-pub_date', '-id').values_list(
+            'id', flat=True
+        )
+    )
+
+
+def test_subscription_cursor_pages_cover_follows(dataset, user_client):
+    assert walk(
+        user_client, '/api/users/subscriptions/?cursor=&limit=1'
+    ) == list(Follow.objects.filter(user=dataset['users'][0]).order_by(
+        'author_id'
+    ).values_list('author_id', flat=True))
+
+
+@pytest.mark.parametrize('path', (
+    '/api/recipes/', '/api/users/subscriptions/'
+))
+@pytest.mark.parametrize('cursor', (
+    'garbage',
+    encode({'id': 1}),
+    encode([1]),
+    encode([1, 2, 3]),
+    encode(['x', 1]),
+    encode([None, 1]),
+    encode(['2026-01-01T00:00:00+00:00', 'abc']),
+    encode([[1], {}]),
+))
+def test_invalid_cursor_is_not_found(dataset, user_client, path, cursor):
+    response = user_client.get(f'{path}?cursor={cursor}')
+    assert response.status_code == 404
+    assert response.json() == {'detail': 'Некорректный курсор'}
+
+
+def test_integer_cursor_for_date_ordering_is_not_found(dataset, user_client):
+    response = user_client.get(f'/api/recipes/?cursor={encode([1, 2])}')
+    assert response.status_code == 404
+
+
+def test_expression_ordering_falls_back_to_pages(dataset, rf):
+    paginator = PageLimitNumberPagination()
+    request = Request(rf.get('/api/recipes/?cursor=&limit=2'))
+    queryset = Recipe.objects.order_by(F('cooking_time').desc())
+    page = paginator.paginate_queryset(queryset, request)
+    assert not paginator.cursor_mode
+    assert [recipe.pk for recipe in page] == list(
+        queryset.values_list('pk', flat=True)[:2]
+    )
@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from collections import Counter
+
+
+from api.exports import export_json
+from recipes.models import Basket, Component
+from users.models import CustomUser
+
+
+def streamed(response):
+    assert response.streaming
+    return b''.join(response.streaming_content).decode()
+
+
+def expected_rows(user):
+    amounts = Counter()
+    for name, unit, amount in Component.objects.filter(
+        recipe__in=Basket.objects.filter(user=user).values('recipe')
+    ).values_list(
+        'product__name', 'product__measurement_unit', 'amount'
+    ):
+        amounts[name, unit] += amount
+    return sorted(
+        (name, unit, amount) for (name, unit), amount in amounts.items()
+    )
+
+
+def test_txt_export(dataset, user_client):
+    response = user_client.get('/api/recipes/download_shopping_cart/')
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/plain; charset=utf-8'
+    assert response['Content-Disposition'] == (
+        'attachment; filename="shopping_list.txt"'
+    )
+    lines = streamed(response).split('\r\n')
+    assert lines[:2] == ['Список продуктов к покупке', '']
+    assert lines[2:-1] == [
+        f'* {name} - {amount} {unit} '
+        for name, unit, amount in expected_rows(dataset['users'][0])
+    ]
+
+
+def test_csv_export(dataset, user_client):
+    response = user_client.get(
+        '/api/recipes/download_shopping_cart/?format=csv'
+    )
+    assert response['Content-Type'] == 'text/csv; charset=utf-8'
+    rows = list(csv.reader(io.StringIO(streamed(response))))
+    assert rows[0] == ['name', 'measurement_unit', 'amount']
+    assert rows[1:] == [
+        [name, unit, str(amount)]
+        for name, unit, amount in expected_rows(dataset['users'][0])
+    ]
+
+
+def test_json_export(dataset, user_client):
+    response = user_client.get(
+        '/api/recipes/download_shopping_cart/?format=json'
+    )
+    assert response['Content-Type'] == 'application/json; charset=utf-8'
+    assert json.loads(streamed(response)) == [
+        {'name': name, 'measurement_unit': unit, 'amount': amount}
+        for name, unit, amount in expected_rows(dataset['users'][0])
+    ]
+
+
+def test_json_export_of_nothing_is_valid():
+    assert json.loads(''.join(export_json(iter(())))) == []
+
+
+def test_unknown_format_rejected(dataset, user_client):
+    response = user_client.get(
+        '/api/recipes/download_shopping_cart/?format=pdf'
+    )
+    assert response.status_code == 400
+
+
+def test_empty_shopping_list_rejected(dataset, anonymous_client):
+    user = CustomUser.objects.create_user(
+        email='empty@example.com', username='empty', password='password'
+    )
+    anonymous_client.force_authenticate(user)
+    response = anonymous_client.get('/api/recipes/download_shopping_cart/')
+    assert response.status_code == 400
@@ -0,0 +1,61 @@
+from datetime import date, datetime, time, timezone
+
+import pytest
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import ORJSONRenderer
+
+LIST_QUERIES = (
+    '',
+    '?page=2&limit=4',
+    '?tags=breakfast&tags=dinner',
+    '?tags=lunch&tags=dinner&tags_match=all',
+    '?is_favorited=1',
+    '?is_in_shopping_cart=1',
+    '?cursor=',
+    '?search=Рецепт',
+)
+
+
+def get_content(client, settings, url, fast):
+    settings.RECIPE_FAST_READ = fast
+    cache.clear()
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.content
+
+
+@pytest.mark.parametrize('query', LIST_QUERIES)
+@pytest.mark.parametrize('authenticated', (False, True))
+def test_fast_list_matches_serializers(dataset, settings, query,
+                                       authenticated, anonymous_client,
+                                       user_client):
+    client = user_client if authenticated else anonymous_client
+    url = f'/api/recipes/{query}'
+    slow = get_content(client, settings, url, fast=False)
+    fast = get_content(client, settings, url, fast=True)
+    assert fast == slow
+
+
+def test_fast_cursor_pages_match(dataset, settings, user_client):
+    url = '/api/recipes/?cursor=&limit=5'
+    while url:
+        slow = get_content(user_client, settings, url, fast=False)
+        fast = get_content(user_client, settings, url, fast=True)
+        assert fast == slow
+        url = user_client.get(url).json()['next']
+
+
+@pytest.mark.parametrize('data', (
+    {'name': 'Борщ', 'amount': 3, 'tags': [1, 2], 'image': None},
+    {'text': 'строка\u2028с\u2029разделителями', 'flag': True},
+    [{'id': 1, 'nested': {'list': ['a', 'б']}}],
+    {
+        'pub_date': datetime(2021, 10, 5, 12, 30, 15, 123456, timezone.utc),
+        'created': datetime(2021, 10, 5, 12, 30, tzinfo=timezone.utc),
+        'day': date(2021, 10, 5), 'time': time(7, 5, 1, 250000),
+    },
+))
+def test_orjson_renderer_matches_json_renderer(data):
+    assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
@@ -0,0 +1,147 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from recipes.models import FeedEntry, Recipe
+from tests.factories import PIXEL_DATA_URI
+from users.models import Follow
+
+
+def client_for(dataset, index):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {dataset["tokens"][index].key}'
+    )
+    return client
+
+
+def new_recipe(dataset):
+    return {
+        'name': 'Свежий рецепт', 'text': 'Описание', 'cooking_time': 5,
+        'image': PIXEL_DATA_URI, 'tags': [dataset['tags'][0].pk],
+        'ingredients': [{'id': dataset['products'][0].pk, 'amount': 5}],
+    }
+
+
+def expected_feed(user):
+    return list(Recipe.objects.filter(
+        author__in=Follow.objects.filter(user=user).values('author_id')
+    ).order_by('-pub_date', '-id').values_list('id', flat=True))
+
+
+def walk_feed(client, limit):
+    ids = []
+    url = f'/api/recipes/feed/?limit={limit}'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        ids.extend(recipe['id'] for recipe in data['results'])
+        url = data['next']
+    return ids
+
+
+@pytest.mark.parametrize('timeline_size, pull_min_recipes', (
+    (500, 1000),
+    (2, 1000),
+    (500, 1),
+    (1, 3),
+))
+@pytest.mark.parametrize('limit', (1, 2, 6))
+def test_feed_matches_followed_recipes(dataset, settings, user_client,
+                                       timeline_size, pull_min_recipes,
+                                       limit):
+    settings.FEED_TIMELINE_SIZE = timeline_size
+    settings.FEED_PULL_MIN_RECIPES = pull_min_recipes
+    call_command('rebuild_feeds', stdout=StringIO())
+    user = dataset['users'][0]
+    assert walk_feed(user_client, limit) == expected_feed(user)
+    assert FeedEntry.objects.filter(user=user).count() <= timeline_size
+
+
+def test_feed_serializes_recipes(dataset, user_client):
+    response = user_client.get('/api/recipes/feed/')
+    data = response.json()
+    assert data['count'] is None
+    assert data['previous'] is None
+    recipe = data['results'][0]
+    listed = user_client.get(f'/api/recipes/{recipe["id"]}/').json()
+    assert recipe == listed
+
+
+def test_follow_backfills_and_unfollow_prunes(dataset, user_client):
+    user, author = dataset['users'][0], dataset['users'][1]
+    assert not Follow.objects.filter(user=user, author=author).exists()
+    response = user_client.post(f'/api/users/{author.pk}/subscribe/')
+    assert response.status_code == 201
+    assert FeedEntry.objects.filter(user=user, author=author).count() == (
+        Recipe.objects.filter(author=author).count()
+    )
+    assert walk_feed(user_client, 2) == expected_feed(user)
+
+    response = user_client.delete(f'/api/users/{author.pk}/subscribe/')
+    assert response.status_code == 204
+    assert not FeedEntry.objects.filter(user=user, author=author).exists()
+    assert walk_feed(user_client, 2) == expected_feed(user)
+
+
+@pytest.mark.parametrize('timeline_size', (500, 2))
+def test_new_recipe_fans_out_to_followers(dataset, settings, timeline_size):
+    settings.FEED_TIMELINE_SIZE = timeline_size
+    author = dataset['users'][2]
+    response = client_for(dataset, 2).post(
+        '/api/recipes/', new_recipe(dataset), format='json'
+    )
+    assert response.status_code == 201
+    recipe = response.json()['id']
+    followers = set(Follow.objects.filter(author=author).values_list(
+        'user_id', flat=True
+    ))
+    assert followers
+    assert set(FeedEntry.objects.filter(recipe=recipe).values_list(
+        'user_id', flat=True
+    )) == followers
+    for user in followers:
+        assert FeedEntry.objects.filter(user=user).count() <= timeline_size
+    assert walk_feed(client_for(dataset, 0), 2) == expected_feed(
+        dataset['users'][0]
+    )
+    assert expected_feed(dataset['users'][0])[0] == recipe
+
+
+def test_prolific_author_is_not_fanned_out(dataset, settings):
+    settings.FEED_PULL_MIN_RECIPES = 1
+    response = client_for(dataset, 2).post(
+        '/api/recipes/', new_recipe(dataset), format='json'
+    )
+    recipe = response.json()['id']
+    assert not FeedEntry.objects.filter(recipe=recipe).exists()
+    feed = client_for(dataset, 0).get('/api/recipes/feed/')
+    assert feed.json()['results'][0]['id'] == recipe
+
+
+def test_demoted_author_is_backfilled(dataset, settings):
+    author = dataset['users'][2]
+    author.refresh_from_db()
+    settings.FEED_PULL_MIN_RECIPES = author.recipes_count
+    call_command('rebuild_feeds', stdout=StringIO())
+    assert not FeedEntry.objects.filter(author=author).exists()
+    recipe = Recipe.objects.filter(author=author).first()
+    response = client_for(dataset, 2).delete(f'/api/recipes/{recipe.pk}/')
+    assert response.status_code == 204
+    assert FeedEntry.objects.filter(author=author).count() == (
+        Follow.objects.filter(author=author).count()
+        * (author.recipes_count - 1)
+    )
+
+
+@pytest.mark.parametrize('cursor', ('garbage', 'WyJ4IiwgMV0'))
+def test_invalid_cursor(dataset, user_client, cursor):
+    response = user_client.get(f'/api/recipes/feed/?cursor={cursor}')
+    assert response.status_code == 404
+
+
+def test_anonymous_feed_rejected(dataset, anonymous_client):
+    assert anonymous_client.get('/api/recipes/feed/').status_code == 401
@@ -0,0 +1,104 @@
+import pytest
+
+from api.indexes import RecipeProductMatrix, pantry_matrix
+from recipes.models import Component, Product, Recipe
+from users.models import CustomUser
+
+RECIPES = {
+    'full': 'ABC',
+    'pair': 'AB',
+    'twin': 'AB',
+    'wide': 'ADEF',
+    'single': 'D',
+    'one_short': 'BCD',
+}
+UNKNOWN = 10 ** 6
+
+
+@pytest.fixture
+def pantry(db, monkeypatch):
+    monkeypatch.setattr(pantry_matrix, '_sequence', None)
+    author = CustomUser.objects.create_user(
+        email='cook@example.com', username='cook', password='password'
+    )
+    products = {
+        letter: Product.objects.create(name=letter, measurement_unit='г')
+        for letter in 'ABCDEF'
+    }
+    recipes = {}
+    for name, letters in RECIPES.items():
+        recipe = Recipe.objects.create(
+            author=author, title=name, text=name, picture='images/x.png'
+        )
+        Component.objects.bulk_create(
+            Component(recipe=recipe, product=products[letter], amount=1)
+            for letter in letters
+        )
+        recipes[name] = recipe.pk
+    names = {pk: name for name, pk in recipes.items()}
+    return products, recipes, names
+
+
+def ranked(matrix, pantry, letters, max_missing, *extra):
+    products, _, names = pantry
+    product_ids = {products[letter].pk for letter in letters}
+    return [
+        names[pk]
+        for pk in matrix.match(product_ids | set(extra), max_missing)
+    ]
+
+
+def test_ranking_by_missing_then_covered_then_newest(pantry):
+    matrix = RecipeProductMatrix()
+    assert ranked(matrix, pantry, 'ABC', 2) == [
+        'full', 'twin', 'pair', 'one_short'
+    ]
+    assert ranked(matrix, pantry, 'ABC', 3) == [
+        'full', 'twin', 'pair', 'one_short', 'wide'
+    ]
+    assert ranked(matrix, pantry, 'ABC', 0) == ['full', 'twin', 'pair']
+
+
+def test_empty_pantry_matches_nothing(pantry):
+    matrix = RecipeProductMatrix()
+    assert ranked(matrix, pantry, '', 10) == []
+
+
+def test_unknown_products_are_ignored(pantry):
+    matrix = RecipeProductMatrix()
+    assert ranked(matrix, pantry, 'A', 2, UNKNOWN) == [
+        'twin', 'pair', 'full'
+    ]
+    assert ranked(matrix, pantry, '', 10, UNKNOWN) == []
+
+
+def test_matrix_follows_component_changes(pantry,
+                                          django_capture_on_commit_callbacks):
+    products, recipes, _ = pantry
+    matrix = RecipeProductMatrix()
+    assert ranked(matrix, pantry, 'D', 0) == ['single']
+    with django_capture_on_commit_callbacks(execute=True):
+        Component.objects.create(
+            recipe_id=recipes['single'], product=products['E'], amount=1
+        )
+    assert ranked(matrix, pantry, 'D', 0) == []
+    assert ranked(matrix, pantry, 'DE', 0) == ['single']
+
+
+def test_pantry_endpoint(pantry, anonymous_client):
+    products, _, names = pantry
+    ids = ','.join(str(products[letter].pk) for letter in 'ABC')
+    response = anonymous_client.get(
+        f'/api/recipes/pantry/?products={ids},{UNKNOWN}&max_missing=0'
+    )
+    assert response.status_code == 200
+    assert [names[item['id']] for item in response.json()['results']] == [
+        'full', 'twin', 'pair'
+    ]
+
+
+@pytest.mark.parametrize('query', ('', '?products=', '?products=x',
+                                   '?products=1&max_missing=y'))
+def test_pantry_endpoint_rejects_bad_input(pantry, anonymous_client, query):
+    response = anonymous_client.get(f'/api/recipes/pantry/{query}')
+    assert response.status_code == 400
@@ -0,0 +1,71 @@
+import pytest
+
+from api.indexes import ProductPrefixIndex
+from recipes.models import Product
+
+NAMES = (
+    'Мёд', 'мед липовый', 'Медведь', 'Соль', 'Соль морская', 'Фасоль',
+    'Солод', 'Перец', 'Сахар',
+)
+
+
+@pytest.fixture
+def products(db):
+    Product.objects.bulk_create(
+        Product(name=name, measurement_unit='г') for name in NAMES
+    )
+    return {
+        product.name: product for product in Product.objects.all()
+    }
+
+
+def names(rows):
+    return [row['name'] for row in rows]
+
+
+def test_prefix_matches_come_first_then_substrings(products):
+    index = ProductPrefixIndex()
+    assert names(index.search('соль', 10)) == [
+        'Соль', 'Соль морская', 'Фасоль'
+    ]
+    assert names(index.search('Сол', 10)) == [
+        'Солод', 'Соль', 'Соль морская', 'Фасоль'
+    ]
+
+
+def test_search_ignores_case_and_yo(products):
+    index = ProductPrefixIndex()
+    assert names(index.search('МЕД', 10)) == [
+        'Мёд', 'мед липовый', 'Медведь'
+    ]
+
+
+def test_limit_and_row_shape(products):
+    index = ProductPrefixIndex()
+    rows = index.search('с', 2)
+    assert names(rows) == ['Сахар', 'Солод']
+    assert rows[0] == {
+        'id': products['Сахар'].pk, 'name': 'Сахар', 'measurement_unit': 'г'
+    }
+    assert index.search('с', 0) == []
+    assert index.search('нет такого', 5) == []
+
+
+def test_index_reloads_after_product_changes(products,
+                                             django_assert_num_queries):
+    index = ProductPrefixIndex()
+    index.search('пер', 5)
+    with django_assert_num_queries(0):
+        assert names(index.search('пер', 5)) == ['Перец']
+    Product.objects.create(name='Перепел', measurement_unit='шт')
+    assert names(index.search('пер', 5)) == ['Перепел', 'Перец']
+    products['Перец'].delete()
+    assert names(index.search('пер', 5)) == ['Перепел']
+
+
+def test_endpoint_uses_index(products, anonymous_client):
+    response = anonymous_client.get('/api/ingredients/?name=сол&limit=2')
+    assert response.status_code == 200
+    assert names(response.json()) == ['Солод', 'Соль']
+    response = anonymous_client.get('/api/ingredients/?name=сол&limit=x')
+    assert response.status_code == 400
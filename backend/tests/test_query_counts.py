@@ -0,0 +1,123 @@
+import pytest
+from rest_framework.test import APIClient
+
+from api.loaders import RelationshipLoader
+
+from recipes.models import Basket, FavourRecipe, Recipe
+from tests.factories import seed_dataset
+from users.models import Follow
+
+SIZES = (3, 8)
+
+
+def client_for(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+@pytest.mark.parametrize('recipes_per_user', SIZES)
+@pytest.mark.parametrize('viewer', (None, 0))
+def test_recipe_list_queries(db, django_assert_num_queries, viewer,
+                             recipes_per_user):
+    dataset = seed_dataset(recipes_per_user=recipes_per_user)
+    user = None if viewer is None else dataset['users'][viewer]
+    with django_assert_num_queries(4):
+        response = client_for(user).get('/api/recipes/?limit=50')
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert len(results) == len(dataset['recipes'])
+    assert all(recipe['ingredients'] and recipe['tags']
+               for recipe in results)
+    favorites = set(FavourRecipe.objects.filter(user=user).values_list(
+        'recipe_id', flat=True
+    )) if user else set()
+    cart = set(Basket.objects.filter(user=user).values_list(
+        'recipe_id', flat=True
+    )) if user else set()
+    following = set(Follow.objects.filter(user=user).values_list(
+        'author_id', flat=True
+    )) if user else set()
+    for recipe in results:
+        assert recipe['is_favorited'] == (recipe['id'] in favorites)
+        assert recipe['is_in_shopping_cart'] == (recipe['id'] in cart)
+        assert recipe['author']['is_subscribed'] == (
+            recipe['author']['id'] in following
+        )
+
+
+@pytest.mark.parametrize('recipes_per_user', SIZES)
+def test_recipe_detail_queries(db, django_assert_num_queries,
+                               recipes_per_user):
+    dataset = seed_dataset(recipes_per_user=recipes_per_user)
+    recipe = dataset['recipes'][0]
+    with django_assert_num_queries(3):
+        response = client_for(dataset['users'][0]).get(
+            f'/api/recipes/{recipe.pk}/'
+        )
+    assert response.status_code == 200
+    assert response.json()['is_favorited'] is True
+
+
+@pytest.mark.parametrize('recipes_per_user', SIZES)
+@pytest.mark.parametrize('recipes_limit', (None, 1, 2))
+def test_subscriptions_queries(db, django_assert_num_queries,
+                               recipes_per_user, recipes_limit):
+    dataset = seed_dataset(users=6, recipes_per_user=recipes_per_user)
+    user = dataset['users'][0]
+    query = f'&recipes_limit={recipes_limit}' if recipes_limit else ''
+    with django_assert_num_queries(3):
+        response = client_for(user).get(
+            f'/api/users/subscriptions/?limit=10{query}'
+        )
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert {author['id'] for author in results} == set(
+        Follow.objects.filter(user=user).values_list('author_id', flat=True)
+    )
+    for author in results:
+        expected = list(Recipe.objects.filter(
+            author_id=author['id']
+        ).order_by('-pub_date', '-id').values_list('id', flat=True))
+        assert author['recipes_count'] == len(expected)
+        assert author['is_subscribed'] is True
+        assert [recipe['id'] for recipe in author['recipes']] == (
+            expected[:recipes_limit]
+        )
+
+
+@pytest.mark.parametrize('users', (4, 9))
+def test_user_list_queries(db, django_assert_num_queries, users):
+    dataset = seed_dataset(users=users, recipes_per_user=1)
+    user = dataset['users'][0]
+    with django_assert_num_queries(4):
+        response = client_for(user).get(f'/api/users/?limit={users}')
+    assert response.status_code == 200
+    following = set(Follow.objects.filter(user=user).values_list(
+        'author_id', flat=True
+    ))
+    results = response.json()['results']
+    assert len(results) == users
+    for author in results:
+        assert author['is_subscribed'] == (author['id'] in following)
+
+
+def test_relationship_loader_batches_primed_ids(dataset,
+                                                django_assert_num_queries):
+    user = dataset['users'][0]
+    loader = RelationshipLoader(user)
+    recipes = [recipe.pk for recipe in dataset['recipes']]
+    loader.prime('favorited', recipes)
+    loader.prime('in_shopping_cart', recipes)
+    with django_assert_num_queries(2):
+        favorited = {pk for pk in recipes if loader.load('favorited', pk)}
+        in_cart = {pk for pk in recipes if loader.load('in_shopping_cart', pk)}
+    assert favorited == set(FavourRecipe.objects.filter(
+        user=user
+    ).values_list('recipe_id', flat=True))
+    assert in_cart == set(Basket.objects.filter(
+        user=user
+    ).values_list('recipe_id', flat=True))
+    with django_assert_num_queries(0):
+        assert RelationshipLoader().load('favorited', recipes[0]) is False
@@ -0,0 +1,101 @@
+import base64
+from io import BytesIO
+
+import pytest
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from recipes import images
+from recipes.models import Recipe
+
+
+def png(width, height, color=(200, 80, 40)):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def data_uri(content):
+    return f'data:image/png;base64,{base64.b64encode(content).decode()}'
+
+
+@pytest.fixture
+def picture(db):
+    return images.save_picture(ContentFile(png(2400, 1200), 'photo.png'))
+
+
+def test_same_content_is_stored_once():
+    content = png(10, 10, (1, 2, 3))
+    first = images.save_picture(ContentFile(content, 'a.PNG'))
+    second = images.save_picture(ContentFile(content, 'b.png'))
+    other = images.save_picture(ContentFile(png(10, 10), 'c.png'))
+    assert first == second != other
+    assert first.startswith('images/') and first.endswith('.png')
+
+
+def test_variants_are_bounded_and_encoded(picture):
+    variants = images.render_variants(picture)
+    assert set(variants) == set(settings.RECIPE_IMAGE_VARIANTS)
+    for variant, (width, height) in settings.RECIPE_IMAGE_VARIANTS.items():
+        assert set(variants[variant]) == {'webp', 'jpeg'}
+        for image_format, path in variants[variant].items():
+            with default_storage.open(path) as file:
+                image = Image.open(file)
+                assert image.format == image_format.upper()
+                assert image.size == (width, height)
+
+
+def test_existing_variants_are_not_rendered_again(picture, monkeypatch):
+    first = images.render_variants(picture)
+    monkeypatch.setattr(
+        Image, 'open', lambda *args, **kwargs: pytest.fail('re-rendered')
+    )
+    assert images.render_variants(picture) == first
+
+
+def test_new_recipe_gets_variants(dataset, user_client,
+                                  django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.post('/api/recipes/', {
+            'name': 'С картинкой', 'text': 'Описание', 'cooking_time': 5,
+            'image': data_uri(png(1000, 800)),
+            'tags': [dataset['tags'][0].pk],
+            'ingredients': [{'id': dataset['products'][0].pk, 'amount': 1}],
+        }, format='json')
+    assert response.status_code == 201
+    recipe = Recipe.objects.get(pk=response.json()['id'])
+    assert recipe.picture_variants == images.render_variants(
+        recipe.picture.name
+    )
+    data = user_client.get(f'/api/recipes/{recipe.pk}/').json()
+    assert data['image_variants']['list']['webp'] == (
+        'http://testserver' + default_storage.url(
+            recipe.picture_variants['list']['webp']
+        )
+    )
+
+
+def test_processed_picture_invalidates_cached_recipe(
+        dataset, anonymous_client, django_capture_on_commit_callbacks):
+    recipe = dataset['recipes'][0]
+    path = f'/api/recipes/{recipe.pk}/'
+    assert not anonymous_client.get(path).json()['image_variants']
+    with django_capture_on_commit_callbacks(execute=True):
+        images.process_recipe_picture(recipe.pk, recipe.picture.name)
+    assert anonymous_client.get(path).json()['image_variants']
+
+
+def test_stale_picture_is_not_overwritten(dataset, picture):
+    recipe = dataset['recipes'][0]
+    images.process_recipe_picture(recipe.pk, picture)
+    recipe.refresh_from_db()
+    assert recipe.picture.name != picture
+    assert recipe.picture_variants == {}
+
+
+def test_background_failure_is_logged(dataset, caplog):
+    recipe = dataset['recipes'][0]
+    images.process_in_background(recipe.pk, 'images/missing.png')
+    assert 'images/missing.png' in caplog.text
@@ -0,0 +1,116 @@
+import re
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Component
+
+COMPONENTS = Component._meta.db_table
+TAGS = 'recipes_recipe_tags'
+
+
+def statements(queries, table):
+    patterns = {
+        'INSERT': rf'INSERT (OR IGNORE )?INTO "{table}"',
+        'UPDATE': rf'UPDATE "{table}"',
+        'DELETE': rf'DELETE FROM "{table}"',
+    }
+    return {
+        kind: sum(bool(re.match(pattern, query['sql'])) for query in queries)
+        for kind, pattern in patterns.items()
+    }
+
+
+def components(recipe):
+    return {
+        component.product_id: (component.pk, component.amount)
+        for component in Component.objects.filter(recipe=recipe)
+    }
+
+
+def patch(client, recipe, data):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.patch(
+            f'/api/recipes/{recipe.pk}/', data, format='json'
+        )
+    assert response.status_code == 200, response.content
+    return response, queries.captured_queries
+
+
+def test_partial_update_writes_only_changes(dataset, user_client):
+    recipe = dataset['recipes'][0]
+    before = components(recipe)
+    kept, changed, removed = list(before)[:3]
+    added = next(
+        product.pk for product in dataset['products']
+        if product.pk not in before
+    )
+    old_tags = set(recipe.tags.values_list('id', flat=True))
+    new_tag = next(
+        tag.pk for tag in dataset['tags'] if tag.pk not in old_tags
+    )
+    tags = sorted(old_tags)[1:] + [new_tag]
+    ingredients = [
+        {'id': product_id, 'amount': before[product_id][1]}
+        for product_id in before if product_id not in (changed, removed)
+    ]
+    ingredients += [
+        {'id': changed, 'amount': before[changed][1] + 5},
+        {'id': added, 'amount': 3},
+    ]
+
+    response, queries = patch(user_client, recipe, {
+        'ingredients': ingredients, 'tags': tags,
+    })
+
+    assert statements(queries, COMPONENTS) == {
+        'INSERT': 1, 'UPDATE': 1, 'DELETE': 1
+    }
+    assert statements(queries, TAGS) == {
+        'INSERT': 1, 'UPDATE': 0, 'DELETE': 1
+    }
+    after = components(recipe)
+    assert {
+        product_id: amount for product_id, (_, amount) in after.items()
+    } == {item['id']: item['amount'] for item in ingredients}
+    assert after[kept] == before[kept]
+    assert after[changed][0] == before[changed][0]
+    assert removed not in after
+    assert set(recipe.tags.values_list('id', flat=True)) == set(tags)
+    assert {
+        (item['id'], item['amount'])
+        for item in response.json()['ingredients']
+    } == {(item['id'], item['amount']) for item in ingredients}
+    assert {tag['id'] for tag in response.json()['tags']} == set(tags)
+
+
+def test_unchanged_relations_are_not_rewritten(dataset, user_client):
+    recipe = dataset['recipes'][0]
+    before = components(recipe)
+    response, queries = patch(user_client, recipe, {
+        'ingredients': [
+            {'id': product_id, 'amount': amount}
+            for product_id, (_, amount) in before.items()
+        ],
+        'tags': list(recipe.tags.values_list('id', flat=True)),
+        'cooking_time': 42,
+    })
+    assert statements(queries, COMPONENTS) == {
+        'INSERT': 0, 'UPDATE': 0, 'DELETE': 0
+    }
+    assert statements(queries, TAGS) == {
+        'INSERT': 0, 'UPDATE': 0, 'DELETE': 0
+    }
+    assert components(recipe) == before
+    assert response.json()['cooking_time'] == 42
+
+
+def test_fields_left_out_of_patch_are_kept(dataset, user_client):
+    recipe = dataset['recipes'][0]
+    before = components(recipe)
+    tags = set(recipe.tags.values_list('id', flat=True))
+    patch(user_client, recipe, {'name': 'Переименованный рецепт'})
+    recipe.refresh_from_db()
+    assert recipe.title == 'Переименованный рецепт'
+    assert components(recipe) == before
+    assert set(recipe.tags.values_list('id', flat=True)) == tags
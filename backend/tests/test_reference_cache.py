@@ -0,0 +1,88 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+
+from api import caching
+from foodgram import settings as project_settings
+from recipes.models import Product, Tag
+
+ENDPOINTS = ('/api/tags/', '/api/ingredients/')
+
+
+@pytest.mark.parametrize('path', ENDPOINTS)
+def test_repeated_reads_skip_the_database(dataset, anonymous_client,
+                                          django_assert_num_queries, path):
+    first = anonymous_client.get(path)
+    with django_assert_num_queries(0):
+        second = anonymous_client.get(path)
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second['ETag'] == first['ETag']
+    assert second['Cache-Control'] == (
+        f'public, max-age={settings.REFERENCE_CACHE_MAX_AGE}'
+    )
+
+
+@pytest.mark.parametrize('path', ENDPOINTS)
+def test_conditional_get(dataset, anonymous_client, path):
+    etag = anonymous_client.get(path)['ETag']
+    response = anonymous_client.get(path, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+    assert not response.content
+    response = anonymous_client.get(path, HTTP_IF_NONE_MATCH='"stale"')
+    assert response.status_code == 200
+
+
+def test_tag_change_bumps_version(dataset, anonymous_client):
+    before = anonymous_client.get('/api/tags/')
+    tag = dataset['tags'][0]
+    detail = anonymous_client.get(f'/api/tags/{tag.pk}/')
+    tag.name = 'Полдник'
+    tag.save()
+    after = anonymous_client.get('/api/tags/')
+    assert after['ETag'] != before['ETag']
+    assert 'Полдник' in {item['name'] for item in after.json()}
+    assert anonymous_client.get(
+        f'/api/tags/{tag.pk}/', HTTP_IF_NONE_MATCH=detail['ETag']
+    ).status_code == 200
+    Tag.objects.filter(pk=tag.pk).delete()
+    assert len(anonymous_client.get('/api/tags/').json()) == (
+        len(dataset['tags']) - 1
+    )
+
+
+def test_product_change_bumps_version(dataset, anonymous_client):
+    before = anonymous_client.get('/api/ingredients/')
+    Product.objects.create(name='Шафран', measurement_unit='г')
+    after = anonymous_client.get('/api/ingredients/')
+    assert after['ETag'] != before['ETag']
+    assert len(after.json()) == len(before.json()) + 1
+
+
+def test_missing_objects_are_not_cached(dataset, anonymous_client,
+                                        django_assert_num_queries):
+    assert anonymous_client.get('/api/tags/999999/').status_code == 404
+    with django_assert_num_queries(1):
+        assert anonymous_client.get('/api/tags/999999/').status_code == 404
+
+
+def test_default_cache_is_shared_between_processes(dataset, settings,
+                                                   anonymous_client,
+                                                   monkeypatch):
+    assert 'locmem' not in project_settings.CACHES['default']['BACKEND']
+    settings.CACHES = project_settings.CACHES
+    call_command('createcachetable')
+    anonymous_client.get('/api/tags/')
+    tag = dataset['tags'][0]
+    Tag.objects.filter(pk=tag.pk).update(name='Полдник')
+    other_process = caches.create_connection('default')
+    assert other_process is not caches['default']
+    monkeypatch.setattr(caching, 'cache', other_process)
+    caching.bump_version('tags')
+    monkeypatch.undo()
+    names = {item['name'] for item in anonymous_client.get(
+        '/api/tags/'
+    ).json()}
+    assert 'Полдник' in names
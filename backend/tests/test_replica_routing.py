@@ -0,0 +1,109 @@
+import pytest
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api import routers
+from tests.factories import seed_dataset
+
+pytestmark = pytest.mark.django_db(
+    transaction=True, databases=('default', 'replica_1')
+)
+
+
+@pytest.fixture
+def replicas(settings):
+    settings.DATABASE_REPLICAS = ['replica_1']
+    routers.replica_health.reset()
+    yield
+    routers.replica_health.reset()
+
+
+@pytest.fixture
+def routed(replicas):
+    dataset = seed_dataset()
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {dataset["tokens"][0].key}'
+    )
+    return dataset, client
+
+
+def queries(client, method, url, alias):
+    with CaptureQueriesContext(connections[alias]) as context:
+        response = getattr(client, method)(url)
+    assert response.status_code < 400
+    return [query['sql'] for query in context.captured_queries]
+
+
+def recipe_queries(sql):
+    return [query for query in sql if 'recipes_recipe' in query]
+
+
+@pytest.mark.parametrize('url', (
+    '/api/recipes/', '/api/users/', '/api/users/subscriptions/',
+))
+def test_safe_requests_read_from_replica(routed, url):
+    _, client = routed
+    assert queries(client, 'get', url, 'replica_1')
+    assert not recipe_queries(queries(client, 'get', url, 'default'))
+
+
+def test_writes_pin_reads_to_primary(routed):
+    dataset, client = routed
+    recipe = dataset['recipes'][1]
+    queries(client, 'post', f'/api/recipes/{recipe.pk}/favorite/', 'default')
+    assert not queries(client, 'get', '/api/recipes/', 'replica_1')
+    assert recipe_queries(queries(client, 'get', '/api/recipes/', 'default'))
+
+    other = APIClient()
+    other.credentials(
+        HTTP_AUTHORIZATION=f'Token {dataset["tokens"][1].key}'
+    )
+    assert queries(other, 'get', '/api/recipes/', 'replica_1')
+
+
+def test_pin_survives_unshared_cache(routed):
+    dataset, client = routed
+    recipe = dataset['recipes'][1]
+    queries(client, 'post', f'/api/recipes/{recipe.pk}/favorite/', 'default')
+    cache.clear()
+    assert not queries(client, 'get', '/api/recipes/', 'replica_1')
+    assert recipe_queries(queries(client, 'get', '/api/recipes/', 'default'))
+
+
+def test_pin_cookie_is_bound_to_token(routed):
+    dataset, client = routed
+    recipe = dataset['recipes'][1]
+    queries(client, 'post', f'/api/recipes/{recipe.pk}/favorite/', 'default')
+    cache.clear()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Token {dataset["tokens"][1].key}'
+    )
+    assert queries(client, 'get', '/api/recipes/', 'replica_1')
+
+
+def test_reads_return_to_replica_when_pin_expires(routed, settings):
+    settings.REPLICA_STICKY_SECONDS = 0
+    dataset, client = routed
+    recipe = dataset['recipes'][1]
+    queries(client, 'post', f'/api/recipes/{recipe.pk}/favorite/', 'default')
+    assert queries(client, 'get', '/api/recipes/', 'replica_1')
+
+
+@pytest.mark.parametrize('failure', (
+    DatabaseError('connection refused'), 60.0,
+))
+def test_unhealthy_replica_falls_back_to_primary(routed, monkeypatch,
+                                                 failure):
+    _, client = routed
+
+    def replica_lag(alias):
+        if isinstance(failure, Exception):
+            raise failure
+        return failure
+
+    monkeypatch.setattr(routers, 'replica_lag', replica_lag)
+    assert not queries(client, 'get', '/api/recipes/', 'replica_1')
+    assert recipe_queries(queries(client, 'get', '/api/recipes/', 'default'))
@@ -0,0 +1,69 @@
+import importlib
+from types import SimpleNamespace
+from urllib.parse import quote
+
+import pytest
+from django.apps import apps
+from django.db import connection
+
+from recipes.models import Recipe
+
+SEARCH = quote('рецепт')
+
+fill_migration = importlib.import_module(
+    'recipes.migrations.0005_recipe_search_vector'
+)
+
+
+def walk(client, url):
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+        data = response.json()
+        ids.extend(recipe['id'] for recipe in data['results'])
+        url = data['next']
+    return ids
+
+
+def test_search_matches_title_text_and_ingredients(dataset, anonymous_client):
+    recipe = dataset['recipes'][3]
+    product = recipe.ingredients.first()
+    for query in ('Рецепт 3', 'описание рецепта 3', product.name.upper()):
+        response = anonymous_client.get(
+            f'/api/recipes/?search={quote(query)}'
+        )
+        assert recipe.pk in {
+            item['id'] for item in response.json()['results']
+        }, query
+
+
+@pytest.mark.parametrize('fast_read', (False, True))
+@pytest.mark.parametrize('limit', (1, 5))
+def test_search_cursor_pages_match_page_numbers(dataset, settings,
+                                                user_client, fast_read,
+                                                limit):
+    settings.RECIPE_FAST_READ = fast_read
+    expected = walk(user_client, f'/api/recipes/?search={SEARCH}&limit=100')
+    assert len(expected) == len(dataset['recipes'])
+    assert walk(
+        user_client, f'/api/recipes/?search={SEARCH}&cursor=&limit={limit}'
+    ) == expected
+
+
+def test_search_cursor_rejects_bad_rank(dataset, user_client):
+    response = user_client.get(
+        f'/api/recipes/?search={SEARCH}&cursor=WyJ4IiwgIngiLCAxXQ'
+    )
+    assert response.status_code == 404
+
+
+def test_migration_fills_missing_vectors(dataset):
+    expected = dict(Recipe.objects.values_list('pk', 'search_vector'))
+    Recipe.objects.update(search_vector=None)
+    fill_migration.fill_search_vectors(
+        apps, SimpleNamespace(connection=connection)
+    )
+    assert dict(Recipe.objects.values_list('pk', 'search_vector')) == (
+        expected
+    )
@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from recipes.models import Basket, ShoppingListItem
+
+
+def stored():
+    return {
+        (user_id, product_id): (amount, recipes_count)
+        for user_id, product_id, amount, recipes_count
+        in ShoppingListItem.objects.values_list(
+            'user_id', 'product_id', 'amount', 'recipes_count'
+        )
+    }
+
+
+def computed():
+    return {
+        (row['user_id'], row['product_id']): (
+            row['amount'], row['recipes_count']
+        )
+        for row in ShoppingListItem.objects.computed()
+    }
+
+
+def rebuild(*args):
+    output = StringIO()
+    call_command('rebuild_shopping_lists', *args, stdout=output)
+    return output.getvalue()
+
+
+def test_seeded_aggregate_matches_baskets(dataset):
+    assert stored() == computed()
+    assert stored()
+
+
+def test_single_add_and_remove(dataset, user_client):
+    recipe = dataset['recipes'][1]
+    response = user_client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+    assert response.status_code == 201
+    assert stored() == computed()
+    response = user_client.delete(f'/api/recipes/{recipe.pk}/shopping_cart/')
+    assert response.status_code == 204
+    assert stored() == computed()
+
+
+def test_bulk_add_and_remove(dataset, user_client):
+    ids = [recipe.pk for recipe in dataset['recipes']]
+    user_client.post('/api/recipes/shopping_cart/', {'ids': ids},
+                     format='json')
+    assert stored() == computed()
+    user_client.delete('/api/recipes/shopping_cart/', {'ids': ids[::2]},
+                       format='json')
+    assert stored() == computed()
+    user_client.delete('/api/recipes/shopping_cart/', {'ids': ids},
+                       format='json')
+    assert not Basket.objects.filter(user=dataset['users'][0]).exists()
+    assert not ShoppingListItem.objects.filter(
+        user=dataset['users'][0]
+    ).exists()
+    assert stored() == computed()
+
+
+def test_component_edit_updates_holders(dataset, user_client):
+    recipe = dataset['recipes'][0]
+    assert Basket.objects.filter(recipe=recipe).count() > 1
+    products = dataset['products']
+    response = user_client.patch(f'/api/recipes/{recipe.pk}/', {
+        'ingredients': [
+            {'id': products[0].pk, 'amount': 7},
+            {'id': products[-1].pk, 'amount': 3},
+        ],
+    }, format='json')
+    assert response.status_code == 200
+    assert stored() == computed()
+
+
+def test_recipe_deletion_updates_holders(dataset, user_client):
+    recipe = dataset['recipes'][0]
+    response = user_client.delete(f'/api/recipes/{recipe.pk}/')
+    assert response.status_code == 204
+    assert stored() == computed()
+
+
+def test_rebuild_repairs_drift_and_is_idempotent(dataset):
+    expected = stored()
+    item = ShoppingListItem.objects.filter(user=dataset['users'][0]).first()
+    item.amount += 100
+    item.save()
+    ShoppingListItem.objects.filter(
+        user=dataset['users'][1]
+    ).first().delete()
+    assert 'расхождений: 2' in rebuild('--verify')
+    assert stored() != expected
+    rebuild()
+    assert stored() == expected
+    assert 'расхождений: 0' in rebuild()
+    assert stored() == expected
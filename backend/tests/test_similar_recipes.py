@@ -0,0 +1,63 @@
+from collections import defaultdict
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from recipes.models import RecipeBand, SimilarRecipe
+from recipes.similarity import update_similar_recipes
+
+
+@pytest.mark.parametrize('pk', ('100500', 'abc'))
+def test_similar_unknown_recipe(dataset, anonymous_client, pk):
+    response = anonymous_client.get(f'/api/recipes/{pk}/similar/')
+    assert response.status_code == 404
+
+
+def test_similar_lists_stored_matches(dataset, anonymous_client):
+    first, second = dataset['recipes'][:2]
+    SimilarRecipe.objects.filter(recipe=first).delete()
+    SimilarRecipe.objects.create(recipe=first, similar=second, score=0.5)
+    response = anonymous_client.get(f'/api/recipes/{first.pk}/similar/')
+    assert response.status_code == 200
+    assert [recipe['id'] for recipe in response.json()] == [second.pk]
+
+
+@pytest.mark.parametrize('band, matched', ((0, True), (1, False)))
+def test_buckets_match_within_band(dataset, band, matched):
+    first, second = dataset['recipes'][:2]
+    second.tags.set(first.tags.all())
+    update_similar_recipes([first.pk])
+    bucket = RecipeBand.objects.get(recipe=first, band=0).bucket
+    RecipeBand.objects.filter(recipe=second).delete()
+    RecipeBand.objects.create(recipe=second, band=band, bucket=bucket)
+    SimilarRecipe.objects.filter(recipe=first).delete()
+    update_similar_recipes([first.pk])
+    assert SimilarRecipe.objects.filter(
+        recipe=first, similar=second
+    ).exists() is matched
+
+
+def neighbours():
+    stored = defaultdict(list)
+    for recipe_id, similar_id in SimilarRecipe.objects.order_by(
+        '-score', '-similar_id'
+    ).values_list('recipe_id', 'similar_id'):
+        stored[recipe_id].append(similar_id)
+    return stored
+
+
+@pytest.mark.parametrize('batch_size', (2, 200))
+def test_only_top_neighbours_are_kept(dataset, settings, batch_size):
+    settings.SIMILAR_RECIPES_NEIGHBOURS = 100
+    call_command('rebuild_similar_recipes', stdout=StringIO())
+    everything = neighbours()
+    assert max(map(len, everything.values())) > 2
+    settings.SIMILAR_RECIPES_NEIGHBOURS = 2
+    call_command('rebuild_similar_recipes', f'--batch-size={batch_size}',
+                 stdout=StringIO())
+    assert neighbours() == {
+        recipe_id: similar[:2] for recipe_id, similar in everything.items()
+    }
+    update_similar_recipes([dataset['recipes'][0].pk])
+    assert max(map(len, neighbours().values())) <= 2
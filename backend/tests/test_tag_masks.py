@@ -0,0 +1,86 @@
+from functools import reduce
+from itertools import combinations
+from operator import or_
+
+import pytest
+
+from recipes.models import Recipe, Tag
+
+
+def expected_mask(recipe):
+    return reduce(or_, recipe.tags.values_list('bit_mask', flat=True), 0)
+
+
+def assert_masks_in_sync():
+    for recipe in Recipe.objects.all():
+        assert recipe.tag_mask == expected_mask(recipe), recipe.pk
+
+
+def test_tags_get_distinct_single_bits(dataset):
+    masks = list(Tag.objects.values_list('bit_mask', flat=True))
+    assert len(set(masks)) == len(masks)
+    assert all(mask > 0 and mask & (mask - 1) == 0 for mask in masks)
+    assert_masks_in_sync()
+
+
+def test_forward_m2m_changes(dataset):
+    recipe = dataset['recipes'][0]
+    breakfast, lunch, dinner = dataset['tags']
+    recipe.tags.add(lunch, dinner)
+    assert_masks_in_sync()
+    recipe.tags.remove(breakfast)
+    assert_masks_in_sync()
+    recipe.tags.set([breakfast])
+    assert_masks_in_sync()
+    recipe.tags.clear()
+    recipe.refresh_from_db()
+    assert recipe.tag_mask == 0
+
+
+def test_reverse_m2m_changes(dataset):
+    dinner = dataset['tags'][2]
+    recipes = dataset['recipes']
+    dinner.recipes.add(recipes[0], recipes[1])
+    assert_masks_in_sync()
+    dinner.recipes.remove(recipes[1])
+    assert_masks_in_sync()
+    dinner.recipes.clear()
+    assert_masks_in_sync()
+    assert not Recipe.objects.with_tags([dinner.bit_mask]).exists()
+
+
+def test_tag_deletion_clears_its_bit(dataset):
+    lunch = dataset['tags'][1]
+    assert Recipe.objects.with_tags([lunch.bit_mask]).exists()
+    lunch.delete()
+    assert_masks_in_sync()
+    assert not Recipe.objects.with_tags([lunch.bit_mask]).exists()
+    new_tag = Tag.objects.create(name='Полдник', color='#123456')
+    assert new_tag.bit_mask == lunch.bit_mask
+    assert not Recipe.objects.with_tags([new_tag.bit_mask]).exists()
+
+
+def filtered(client, slugs, match_all=False):
+    query = '&'.join(f'tags={slug}' for slug in slugs)
+    if match_all:
+        query += '&tags_match=all'
+    response = client.get(f'/api/recipes/?limit=100&{query}')
+    assert response.status_code == 200
+    return {recipe['id'] for recipe in response.json()['results']}
+
+
+@pytest.mark.parametrize('match_all', (False, True))
+def test_tags_filter_matches_relations(dataset, anonymous_client, match_all):
+    tags = dataset['tags']
+    for size in (1, 2, 3):
+        for chosen in combinations(tags, size):
+            slugs = {tag.slug for tag in chosen}
+            expected = {
+                recipe.pk for recipe in Recipe.objects.all()
+                if (
+                    slugs <= set(recipe.tags.values_list('slug', flat=True))
+                    if match_all else
+                    slugs & set(recipe.tags.values_list('slug', flat=True))
+                )
+            }
+            assert filtered(anonymous_client, slugs, match_all) == expected
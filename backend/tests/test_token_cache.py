@@ -0,0 +1,95 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+
+
+def token_queries(client, url='/api/users/me/'):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    return response, [
+        query for query in context.captured_queries
+        if 'authtoken_token' in query['sql']
+    ]
+
+
+def test_repeated_requests_skip_token_lookup(user_client):
+    response, queries = token_queries(user_client)
+    assert response.status_code == 200 and len(queries) == 1
+    response, queries = token_queries(user_client)
+    assert response.status_code == 200 and not queries
+    assert token_cache.stats()['local_hits'] == 1
+
+
+def test_unsafe_requests_authenticate_against_database(dataset, user_client):
+    token_queries(user_client)
+    recipe = dataset['recipes'][1]
+    with CaptureQueriesContext(connection) as context:
+        user_client.post(f'/api/recipes/{recipe.pk}/favorite/')
+    assert any(
+        'authtoken_token' in query['sql']
+        for query in context.captured_queries
+    )
+
+
+def test_shared_cache_serves_other_processes(user_client, settings):
+    settings.TOKEN_AUTH_SHARED_CACHE = True
+    token_queries(user_client)
+    token_cache.clear()
+    response, queries = token_queries(user_client)
+    assert response.status_code == 200 and not queries
+    assert token_cache.stats()['shared_hits'] == 1
+
+
+@pytest.mark.parametrize('shared', (False, True))
+def test_logout_revokes_cached_token(user_client, settings, shared,
+                                     django_capture_on_commit_callbacks):
+    settings.TOKEN_AUTH_SHARED_CACHE = shared
+    token_queries(user_client)
+    with django_capture_on_commit_callbacks(execute=True):
+        assert user_client.post('/api/auth/token/logout/').status_code == 204
+    response, _ = token_queries(user_client)
+    assert response.status_code == 401
+
+
+def test_token_deletion_revokes_cached_token(
+        dataset, user_client, django_capture_on_commit_callbacks):
+    token_queries(user_client)
+    with django_capture_on_commit_callbacks(execute=True):
+        Token.objects.filter(user=dataset['users'][0]).delete()
+    response, _ = token_queries(user_client)
+    assert response.status_code == 401
+
+
+def test_deactivation_revokes_cached_user(
+        dataset, user_client, django_capture_on_commit_callbacks):
+    token_queries(user_client)
+    user = dataset['users'][0]
+    user.is_active = False
+    with django_capture_on_commit_callbacks(execute=True):
+        user.save()
+    response, _ = token_queries(user_client)
+    assert response.status_code == 401
+
+
+def test_password_change_refreshes_cached_user(
+        user_client, django_capture_on_commit_callbacks):
+    token_queries(user_client)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.post('/api/users/set_password/', {
+            'current_password': 'password', 'new_password': 'Pa55-word!'
+        }, format='json')
+    assert response.status_code == 204
+    response, queries = token_queries(user_client)
+    assert response.status_code == 200 and len(queries) == 1
+
+
+def test_stats_command(user_client, capsys):
+    token_queries(user_client)
+    token_queries(user_client)
+    call_command('token_auth_stats', '--reset')
+    output = capsys.readouterr().out
+    assert 'local_hits: 1' in output and 'misses: 1' in output
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.8 on 2026-10-18 06:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='basket_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Рецептов в списке покупок'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Рецептов в избранном'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Рецептов'),
+        ),
+    ]
@@ -11,6 +11,22 @@ class CustomUser(AbstractUser):
     email = models.EmailField(max_length=254,
                               unique=True,
                               )
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Рецептов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Подписчиков'
+    )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Рецептов в избранном'
+    )
+    basket_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Рецептов в списке покупок'
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username',
                        'password',
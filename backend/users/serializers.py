@@ -1,7 +1,8 @@
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
 
-from users.models import CustomUser, Follow
+from api.loaders import RelationshipListSerializer, RelationshipSerializerMixin
+from users.models import CustomUser
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
@@ -26,17 +27,18 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         return user
 
 
-class CustomUserSerializer(UserSerializer):
+class CustomUserSerializer(RelationshipSerializerMixin, UserSerializer):
     is_subscribed = serializers.SerializerMethodField()
+    followers_count = serializers.IntegerField(read_only=True)
+
+    relationships = (('subscribed', 'id', 'is_subscribed'),)
 
     class Meta:
         model = CustomUser
         fields = (
             'email', 'id', 'username', 'first_name', 'last_name',
-            'is_subscribed')
+            'is_subscribed', 'followers_count')
+        list_serializer_class = RelationshipListSerializer
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        if user.is_anonymous:
-            return False
-        return Follow.objects.filter(user=user, author=obj.id).exists()
+        return self.get_relationship(obj, 'subscribed')
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
@@ -14,3 +15,11 @@ urlpatterns = [
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.ASYNC_VIEWS:
+    from api import async_views
+
+    urlpatterns = [
+        path('users/subscriptions/', async_views.subscriptions,
+             name='users-subscriptions'),
+    ] + urlpatterns